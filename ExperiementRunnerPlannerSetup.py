@@ -306,4 +306,39 @@ def setup_controller(controller, strategy):
         controller.set_progress_tracker(PandaVerifyFormatTracker)
         return 'results/Landmarks_No_Reachability-results.csv'
     else:
-        raise ValueError('Unknown strategy code: {}'.format(strategy))
\ No newline at end of file
+        raise ValueError('Unknown strategy code: {}'.format(strategy))
+
+class ConfigurationRecorder:
+    """
+    Stands in for a Runner object when calling setup_controller, recording the classes a strategy would use
+    without needing any domain or problem files.
+    """
+    def __init__(self):
+        self.solver = None
+        self.search_queue = None
+        self.heuristic = None
+        self.model = None
+        self.progress_tracker = None
+
+    def set_solver(self, solver):
+        self.solver = solver
+
+    def set_search_queue(self, search_queue):
+        self.search_queue = search_queue
+
+    def set_heuristic(self, heuristic):
+        self.heuristic = heuristic
+
+    def set_model(self, model):
+        self.model = model
+
+    def set_progress_tracker(self, progress_tracker):
+        self.progress_tracker = progress_tracker
+
+
+def get_results_file_name(strategy):
+    """
+    :param strategy: Integer correlating to some predefined planner configuration
+    :return: String of path where results for the strategy are recorded
+    """
+    return setup_controller(ConfigurationRecorder(), strategy)
@@ -1,158 +1,493 @@
-import itertools
+import copy
+import multiprocessing
 import re
 import time
 import os
-import subprocess
 import sys
+import signal
 from datetime import datetime
 import argparse
+from functools import partial
 from math import comb
-from ExperiementRunnerPlannerSetup import (setup_controller, Runner, ProblemPredicate, StateNovelty, ParameterSelector,
+try:
+    import fcntl    # Used to lock results files - not available on Windows
+except ImportError:
+    fcntl = None
+from ExperiementRunnerPlannerSetup import (setup_controller, Runner, StateNovelty,
                                            PartialOrderNoveltySolver, PartialOrderNoveltyMethodsNoResetSolver,
                                            PartialOrderHammingNoveltyNoResetSolver, PandaVerifyModel,
-                                           PandaVerifyFormatTracker)
+                                           PandaVerifyFormatTracker, get_results_file_name)
+from benchmarkManifest import get_problem_name
+from benchmarkSharding import shard_results_file_name
+from calculateResultsStats import read_results, find_results_file, get_results_versions, is_header_row
+import parseCache
+import problemMetricsCache
+from typeIndex import get_type_index
+from factInterning import get_fact_interner, get_final_state_file_name, save_final_state
+from searchInstrumentation import COVERAGE_FOLDER, PAIRS_FOLDER, TELEMETRY_FOLDER, FactCoverageTracker, \
+    FactPairCollector, TelemetrySampler, get_series_file_name
+from searchDriver import SearchDriver
+from memoryMonitor import PeakMemoryMonitor
+from planVerifier import get_verification, get_pipeline
+import phaseTimer
+from phaseTimer import PhaseTimer
 
 
-# This is the message which is displayed upon successful verification of a plan from the PANDA plan verification module
-PANDAVERIFYSUCCESSFULLOUTPUT = "IDs of subtasks used in the plan exist: trueTasks declared in plan actually exist and " \
-                               "can be instantiated as given: trueMethods don't contain duplicate subtasks: " \
-                               "trueMethods don't contain orphaned " \
-                               "tasks: trueMethods can be instantiated: trueOrder induced by methods is present in " \
-                               "plan: truePlan is executable: " \
-                               "truePlan verification result: true"
+# Default amount of seconds the search of a problem may run for
+DEFAULT_TIME_LIMIT = 500000
 
+# Amount of seconds between the progress reports sent while searching (see run_test)
+REPORT_INTERVAL = 10
 
-def run_test(domain_file_path, problem_file_path, strategy):
+
+def run_test(domain_file_path, problem_file_path, strategy, shard=None, time_limit=DEFAULT_TIME_LIMIT,
+             report=None, resume=False, domain=None, parse_cache=False, problem=None, verification_workers=0,
+             verify_cache=False, external_verify=True, metrics_cache=False,
+             save_final_states=False, coverage_interval=0, pair_interval=0, telemetry_interval=0,
+             telemetry_seconds=0, trace_allocations=0, track_best_partial=False):
     """
     :param domain_file_path: String of file path of the problem's domain file
     :param problem_file_path: String of file path of the problem's problem file
-    :param strategy: Integer correlating to planner configuration
+    :param strategy: Integer correlating to planner configuration, or a list of them (see run_strategies)
+    :param shard: (shard index, shard count) if this problem is run as part of a shard, results are then written to
+    the shard's own results file
+    :param time_limit: Float of seconds the search may run for before giving up
+    :param report: Function called with a dictionary of progress so far every REPORT_INTERVAL seconds of search,
+    and with {'written': True} once the results row has been written (None for no reports)
+    :param resume: Boolean - skip the problem if the results file already has a row for it
+    :param domain: Domain object already parsed from domain_file_path (see load_domain), used instead of parsing
+    the domain file again. run_test may modify it, so each call must be given its own copy.
+    :param parse_cache: Boolean - load the parsed domain and problem from the parse cache (see parseCache.py) when
+    they are in it, and add them to it when they are not
+    :param problem: Problem object already parsed (with domain) from problem_file_path, used instead of parsing the
+    problem file again. As with domain, each call must be given its own copy.
+    :param verification_workers: Integer - when above 0, the plan is verified in the background by a pipeline with
+    this many workers (see planVerifier.py) and run_test returns without waiting; the results row is written once the
+    plan has been verified. When 0 the plan is verified before returning.
+    :param verify_cache: Boolean - reuse the verification result of an identical plan for the same domain and problem
+    (see verificationCache.py), and cache the result when there is none
+    :param external_verify: Boolean - verify the plan with the PANDA plan verification module (Verified is 'N/A' if
+    not)
+    :param metrics_cache: Boolean - load the problem's strategy independent metrics (e.g. amount of possible facts)
+    from the problem metrics cache (see problemMetricsCache.py) when they are in it, and add them to it when they are
+    not
+    :param save_final_states: Boolean - save the IDs of the facts in the final state (see factInterning.py), for
+    comparing the final states of strategies offline
+    :param coverage_interval: Integer - when above 0, every this many expansions the facts of the states in the
+    search's frontier are added to a running coverage of the possible facts, whose series is saved to
+    results/coverage (see searchInstrumentation.FactCoverageTracker)
+    :param pair_interval: Integer - when above 0, every this many expansions the pairs of facts which appear together
+    in the states of the search's frontier are added to a running coverage of the possible pairs, whose series is saved
+    to results/pairs (see searchInstrumentation.FactPairCollector)
+    :param telemetry_interval: Integer - when above 0, the search's progress (expansions per second, frontier size,
+    resident memory and novelty counters) is sampled every this many expansions and saved to results/telemetry (see
+    searchInstrumentation.TelemetrySampler)
+    :param telemetry_seconds: Float - when above 0, the search's progress is sampled every this many seconds, as with
+    telemetry_interval
+    :param trace_allocations: Integer - when above 0, the problem's allocations are traced (see tracemalloc) and this
+    many of the sites holding the most memory are recorded in the results file. Tracing slows the search down
+    considerably, so the other results of a traced run should not be compared with untraced runs.
+    :param track_best_partial: Boolean - if no plan is found, record the model with the most operations taken ever
+    added to the frontier (tracked as models are added, see searchInstrumentation.BestPartialModelTracker) rather than
+    the one with the most in the final frontier (scanned when the search ends)
     :return: None
     """
+    if isinstance(strategy, (list, tuple)):
+        run_strategies(domain_file_path, problem_file_path, strategy, shard=shard, time_limit=time_limit,
+                       report=report, resume=resume, domain=domain, parse_cache=parse_cache,
+                       verification_workers=verification_workers, verify_cache=verify_cache,
+                       external_verify=external_verify,
+                       metrics_cache=metrics_cache, save_final_states=save_final_states,
+                       coverage_interval=coverage_interval, pair_interval=pair_interval,
+                       telemetry_interval=telemetry_interval, telemetry_seconds=telemetry_seconds,
+                       trace_allocations=trace_allocations, track_best_partial=track_best_partial)
+        return
+
     print(domain_file_path)
     print(problem_file_path)
+    timer = PhaseTimer()
     controller = Runner(domain_file_path, problem_file_path)    # Initialise controller
 
     file_name = setup_controller(controller, strategy)  # Setup planner with specified configuration
+    if shard is not None:
+        file_name = shard_results_file_name(file_name, shard)
 
-    # Parse files
-    controller.parse_domain()
-    controller.parse_problem()
+    if resume and get_problem_name(problem_file_path) in get_completed_problems(file_name):
+        print("Skipping {}, already in {}".format(problem_file_path, file_name))
+        return
 
-    # Start Search
-    print(datetime.now().strftime("%d/%m/%Y %H:%M:%S"))     # Print start time
-    setup_start_time = time.time()  # Setup start time
+    memory_monitor = PeakMemoryMonitor(trace_allocations)
+    memory_monitor.start()
+    try:
+        # Parse files
+        if problem is not None:
+            controller.domain, controller.problem = domain, problem
+        else:
+            parse_files(controller, domain_file_path, problem_file_path, domain, parse_cache, timer)
 
-    controller.solver.solve(search=False)   # Setup search
+        # Start Search
+        print(datetime.now().strftime("%d/%m/%Y %H:%M:%S"))     # Print start time
+        setup_start_time = time.time()  # Setup start time
 
-    setup_end_time = time.time()    # Setup end time
-    setup_time = setup_end_time - setup_start_time
+        with timer.phase('setup'):
+            controller.solver.solve(search=False)   # Setup search
 
-    num_expansions = 0
-    res = None  # Initially no plan has been returned
+        setup_end_time = time.time()    # Setup end time
+        setup_time = setup_end_time - setup_start_time
 
-    solve_start_time = time.time()  # Solving start time
-    # While no result and time used is less than specified duration
-    while time.time() - solve_start_time < 500000 and not res:
-        res = controller.solver._search(True)   # Run next search step
-        num_expansions += 1
-    solve_end_time = time.time()    # Solving end time
-    solve_time = solve_end_time - solve_start_time
+        with timer.phase('metrics'):
+            observers = []
+            if coverage_interval > 0:
+                coverage_tracker = FactCoverageTracker(get_fact_interner(controller.domain, controller.problem),
+                                                       coverage_interval)
+                observers.append(coverage_tracker)
+            if pair_interval > 0:
+                pair_collector = FactPairCollector(get_fact_interner(controller.domain, controller.problem),
+                                                   pair_interval)
+                observers.append(pair_collector)
+            if telemetry_interval > 0 or telemetry_seconds > 0:
+                telemetry_sampler = TelemetrySampler(telemetry_interval,
+                                                     telemetry_seconds if telemetry_seconds > 0 else None)
+                observers.append(telemetry_sampler)
 
-    solved = True
-    if not res:     # If no result returned
-        solved = False
-        # Find the model with the most operations
-        models = controller.solver.search_models.get_model_list()
-        if len(models) > 0:
-            res = models[0]
-            for m in models[1:]:
-                if m.get_num_operations_taken() > res.get_num_operations_taken():
-                    res = m
+        # Progress reports carry the problem's possible facts and pairs when they are already known, so a row written
+        # for a run killed during search (see write_failed_run) can give the percentages of its best partial model
+        search_report = report
+        known_metrics = get_known_problem_metrics(domain_file_path, problem_file_path, metrics_cache)
+        if report is not None and known_metrics is not None:
+            def search_report(progress):
+                report(dict(progress, all_facts=known_metrics['all_facts'],
+                            possible_pairs=known_metrics['possible_pairs']))
+
+        with timer.phase('search'):
+            driver = SearchDriver(controller, time_limit, search_report, setup_time, observers, REPORT_INTERVAL,
+                                  track_best_partial)
+            res = driver.run()
+        num_expansions, solve_time, status = driver.num_expansions, driver.elapsed, driver.status
+        print("Search overhead {:.3f}s of {:.3f}s".format(driver.overhead_time, solve_time))
+
+        timer.start('metrics')
+        if coverage_interval > 0:
+            coverage_tracker.write_series(get_series_file_name(COVERAGE_FOLDER, get_results_file_name(strategy),
+                                                               get_problem_name(problem_file_path)))
+        if pair_interval > 0:
+            pair_collector.write_series(get_series_file_name(PAIRS_FOLDER, get_results_file_name(strategy),
+                                                             get_problem_name(problem_file_path)))
+        if telemetry_interval > 0 or telemetry_seconds > 0:
+            telemetry_sampler.observe(controller, num_expansions, solve_time)   # Progress at the end of the search
+            telemetry_sampler.write_series(get_series_file_name(TELEMETRY_FOLDER, get_results_file_name(strategy),
+                                                                get_problem_name(problem_file_path)))
+
+        solved = True
+        if not res:     # If no result returned
+            solved = False
+            if driver.best_partial_tracker.attached:
+                res = driver.best   # The model with the most operations ever added to the frontier
+            else:
+                res = get_best_partial_model(controller)
+
+        # Find the percentage of facts in the final state
+        problem_metrics = get_problem_metrics(domain_file_path, problem_file_path, controller.domain,
+                                              controller.problem, metrics_cache)
+        num_possible_facts = problem_metrics['all_facts']
+        total_possible_pairs = problem_metrics['possible_pairs']
+        total_actual_pairs = comb(len(res.current_state.elements), 2) if res is not None else 'N/A'
+        plan_operations = res.get_num_operations_taken() if res is not None else 'N/A'
+        if res is not None:
+            percentage_facts = (len(res.current_state.elements) / num_possible_facts) * 100
+            percentage_pairs = (total_actual_pairs / total_possible_pairs) * 100
         else:
-            res = None
-
-    # Find the percentage of facts in the final state
-    all_possible_facts, total_possible_pairs, total_actual_pairs = \
-        calculate_all_possible_facts_and_pairings(controller.domain, controller.problem, res)
-    if res is not None:
-        percentage_facts = (len(res.current_state.elements) / len(all_possible_facts)) * 100
-        percentage_pairs = (total_actual_pairs / total_possible_pairs) * 100
-    else:
-        percentage_facts = 'N/A'
-        percentage_pairs = 'N/A'
-
-    # Find percentage of novel states
-    if isinstance(controller.solver, PartialOrderNoveltySolver):
-        num_novel_states = controller.solver.num_novel_states
-        num_not_novel_states = controller.solver.num_not_novel_states
-        if num_novel_states + num_not_novel_states == 0:
-            percentage_novel_states = 0
+            percentage_facts = 'N/A'
+            percentage_pairs = 'N/A'
+
+        # Find percentage of novel states
+        if isinstance(controller.solver, PartialOrderNoveltySolver):
+            num_novel_states = controller.solver.num_novel_states
+            num_not_novel_states = controller.solver.num_not_novel_states
+            if num_novel_states + num_not_novel_states == 0:
+                percentage_novel_states = 0
+            else:
+                percentage_novel_states = (num_novel_states / (num_novel_states + num_not_novel_states)) * 100
+            new_state = StateNovelty()
+            num_unique_facts = len(new_state.seen_elements)
+            num_novel_methods = controller.solver.num_novel_methods
+            num_not_novel_methods = controller.solver.num_not_novel_methods
         else:
-            percentage_novel_states = (num_novel_states / (num_novel_states + num_not_novel_states)) * 100
-        new_state = StateNovelty()
-        num_unique_facts = len(new_state.seen_elements)
-        num_novel_methods = controller.solver.num_novel_methods
-        num_not_novel_methods = controller.solver.num_not_novel_methods
-    else:
-        num_novel_states = 'N/A'
-        num_not_novel_states = 'N/A'
-        percentage_novel_states = 'N/A'
-        num_unique_facts = 'N/A'
-        num_novel_methods = 'N/A'
-        num_not_novel_methods = 'N/A'
-
-    # Get amount of facts in the final state
-    if res is not None:
-        model_elements = len(res.current_state.elements)
-    else:
-        model_elements = 'N/A'
+            num_novel_states = 'N/A'
+            num_not_novel_states = 'N/A'
+            percentage_novel_states = 'N/A'
+            num_unique_facts = 'N/A'
+            num_novel_methods = 'N/A'
+            num_not_novel_methods = 'N/A'
 
-    # Find number of novel methods with novel states
-    if isinstance(controller.solver, PartialOrderNoveltyMethodsNoResetSolver) or \
-            isinstance(controller.solver, PartialOrderHammingNoveltyNoResetSolver):
-        num_novel_method_not_novel_state = controller.solver.num_novel_method_not_novel_state
-        num_novel_methods_novel_state = controller.solver.num_novel_methods_novel_state
-    else:
-        num_novel_method_not_novel_state = 'N/A'
-        num_novel_methods_novel_state = 'N/A'
+        # Get amount of facts in the final state
+        if res is not None:
+            model_elements = len(res.current_state.elements)
+        else:
+            model_elements = 'N/A'
+
+        # Find number of novel methods with novel states
+        if isinstance(controller.solver, PartialOrderNoveltyMethodsNoResetSolver) or \
+                isinstance(controller.solver, PartialOrderHammingNoveltyNoResetSolver):
+            num_novel_method_not_novel_state = controller.solver.num_novel_method_not_novel_state
+            num_novel_methods_novel_state = controller.solver.num_novel_methods_novel_state
+        else:
+            num_novel_method_not_novel_state = 'N/A'
+            num_novel_methods_novel_state = 'N/A'
+
+        # Get problem name e.g. 'Rover/p02.hddl'
+        problem_file_path_slashes = [i.start() for i in re.finditer('/', problem_file_path)]
+        problem_file_name = problem_file_path[problem_file_path_slashes[-2] + 1:]
+
+        if save_final_states and res is not None:
+            fact_ids = get_fact_interner(controller.domain, controller.problem).fact_ids(res.current_state.elements)
+            save_final_state(get_final_state_file_name(get_results_file_name(strategy), problem_file_name), fact_ids)
+        timer.stop('metrics')
+    finally:
+        # Stopped even if the run fails, so allocation tracing and the sampler thread do not carry over to the next
+        # problem. Memory used while verifying the plan is not measured, as the plan may be verified in the background
+        peak_rss, top_allocations = memory_monitor.stop()
+
+    def write_results(verification):
+        write_to_file(problem_file_name, num_expansions, solve_time, setup_time,
+                      num_possible_facts, model_elements, percentage_facts,
+                      total_possible_pairs, total_actual_pairs, percentage_pairs,
+                      num_novel_states, num_not_novel_states, percentage_novel_states,
+                      num_unique_facts, num_novel_methods, num_not_novel_methods,
+                      num_novel_method_not_novel_state, num_novel_methods_novel_state, plan_operations,
+                      verification['wall_time'], verification['cpu_time'],
+                      verification.get('exit_code', 'N/A'), driver.overhead_time,
+                      peak_rss, top_allocations, timer,
+                      status, solved, verification['verified'], file_name)
+        if report is not None:
+            report({'written': True})
 
     # Check if we should validate the plan returned
-    if res is not None and isinstance(res, PandaVerifyModel) and \
-            isinstance(res.progress_tracker, PandaVerifyFormatTracker) and sys.platform != "win32":
-        output_file_name = "{}.txt".format(strategy)    # File name for plan to be written to
-        controller.output_result_file(res, output_file_name)    # Write plan to file
+    verification = {'verified': 'N/A', 'wall_time': 'N/A', 'cpu_time': 'N/A'}
+    if can_verify(res):
+        # File name for plan to be written to - unique per problem so concurrent runs do not overwrite each other
+        output_file_name = "{}-{}.txt".format(strategy, problem_file_name.replace('/', '-'))
+        with timer.phase('plan_output'):
+            controller.output_result_file(res, output_file_name)    # Write plan to file
 
-        # print('OUTPUT FILE NAME: {}'.format(output_file_name))
-        # print('VERIFYING')
+        with timer.phase('verification'):
+            # Run PANDA plan verification, in the background if the next problem can be searched meanwhile. A child
+            # process only runs this problem before exiting, so it verifies the plan itself.
+            if not external_verify:
+                pass
+            elif verification_workers > 0 and multiprocessing.parent_process() is None:
+                get_pipeline(verification_workers).submit(domain_file_path, problem_file_path, output_file_name,
+                                                          write_results, verify_cache)
+                verification = None     # The results are written once the plan has been verified
+            else:
+                verification = get_verification(domain_file_path, problem_file_path, output_file_name, verify_cache)
+    if verification is not None:
+        write_results(verification)
 
-        # Run PANDA plan verification
-        result = subprocess.run(
-            './pandaPIparser -C --verify {} {} output/{}'.format(domain_file_path, problem_file_path, output_file_name),
-            shell=True, capture_output=True, text=True)
 
-        output = ''.join(s for s in str(result.stdout) if 31 < ord(s) < 126)    # Get plan verification output
+def run_search(controller, time_limit=DEFAULT_TIME_LIMIT, report=None, setup_time=None, observers=None):
+    """
+    :param controller: Runner object whose search has been setup (solver.solve(search=False))
+    :param time_limit: Float of seconds the search may run for before giving up
+    :param report: Function called with a dictionary of progress so far every REPORT_INTERVAL seconds (None for no
+    reports)
+    :param setup_time: Float of time taken to setup (seconds), included in progress reports
+    :param observers: List of search observers (see searchInstrumentation.py). Each observer's observe method is
+    called with (controller, expansions taken, seconds searched) every observer.interval expansions. Time spent
+    observing is included in the time taken.
+    :return: (Model returned by the search (None if no plan was found), Integer of expansions taken,
+    Float of time taken (seconds), String of status - 'solved', 'timeout' or 'memout')
+    """
+    driver = SearchDriver(controller, time_limit, report, setup_time, observers, REPORT_INTERVAL)
+    res = driver.run()
+    return res, driver.num_expansions, driver.elapsed, driver.status
 
-        # Check if successful verification message in output
-        if PANDAVERIFYSUCCESSFULLOUTPUT in output:
-            verified = True
-        else:
-            verified = False
-        # print('VERIFIED: {}'.format(verified))
+
+def get_best_partial_model(controller):
+    """
+    :param controller: Runner object whose search has ended without a plan
+    :return: Model in the search's frontier with the most operations taken (None if there is none, or the frontier
+    can not be listed)
+    """
+    try:
+        models = controller.solver.search_models.get_model_list()
+        best = None
+        for m in models:
+            if best is None or m.get_num_operations_taken() > best.get_num_operations_taken():
+                best = m
+        return best
+    except MemoryError:
+        return None
+
+
+def can_verify(res):
+    """
+    :param res: Model returned by the search (or None)
+    :return: Boolean - can the model's plan be verified by the PANDA plan verification module
+    """
+    return res is not None and isinstance(res, PandaVerifyModel) and \
+        isinstance(res.progress_tracker, PandaVerifyFormatTracker) and sys.platform != "win32"
+
+
+def parse_files(controller, domain_file_path, problem_file_path, domain=None, parse_cache=False, timer=None):
+    """
+    :param controller: Runner object to parse the files with
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param domain: Domain object already parsed from domain_file_path (None to parse the domain file)
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :param timer: PhaseTimer to time parsing with (see phaseTimer.py), None for no timing. Loading the domain and
+    problem from the parse cache is timed as parsing the problem.
+    :return: None
+
+    Sets controller.domain and controller.problem.
+    """
+    timer = timer if timer is not None else PhaseTimer()
+    with timer.phase('parse_problem'):
+        parsed = parseCache.load_problem(domain_file_path, problem_file_path) if parse_cache else None
+    if parsed is not None:
+        controller.domain, controller.problem = parsed
     else:
-        verified = 'N/A'
+        if domain is not None:
+            controller.domain = domain
+        else:
+            with timer.phase('parse_domain'):
+                controller.parse_domain()
+        with timer.phase('parse_problem'):
+            controller.parse_problem()
+            if parse_cache:
+                parseCache.save_problem(domain_file_path, problem_file_path, controller.domain, controller.problem)
 
-    # Write to file
-    problem_file_path_slashes = [i.start() for i in re.finditer('/', problem_file_path)]
-    problem_file_name = problem_file_path[problem_file_path_slashes[-2] + 1:]
 
-    write_to_file(problem_file_name, num_expansions, solve_time, setup_time,
-                  len(all_possible_facts), model_elements, percentage_facts,
-                  total_possible_pairs, total_actual_pairs, percentage_pairs,
-                  num_novel_states, num_not_novel_states, percentage_novel_states,
-                  num_unique_facts, num_novel_methods, num_not_novel_methods,
-                  num_novel_method_not_novel_state, num_novel_methods_novel_state,
-                  solved, verified, file_name)
+def run_strategies(domain_file_path, problem_file_path, strategies, resume=False, domain=None, parse_cache=False,
+                   metrics_cache=False, **options):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param strategies: List of integers correlating to planner configurations
+    :param resume: Boolean - skip strategies whose results file already has a row for the problem
+    :param domain: Domain object already parsed from domain_file_path (None to parse the domain file)
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :param metrics_cache: Boolean - use the problem metrics cache (see problemMetricsCache.py)
+    :param options: Keyword arguments passed on to run_test for every strategy
+    :return: None
+
+    Parses the problem once, then runs each strategy on it in turn. Each strategy is run in a child process forked
+    from the parsed state, so strategies can not affect each other's domain and problem objects (where fork is not
+    available each strategy is given a copy instead). Each strategy writes its row to its own results file.
+    """
+    if resume:
+        problem_name = get_problem_name(problem_file_path)
+        shard = options.get('shard')
+        strategies = [strategy for strategy in strategies
+                      if problem_name not in get_completed_problems(
+                          shard_results_file_name(get_results_file_name(strategy), shard) if shard is not None
+                          else get_results_file_name(strategy))]
+        if not strategies:
+            print("Skipping {}, already run by every strategy".format(problem_file_path))
+            return
+
+    domain, problem = load_problem(domain_file_path, problem_file_path, domain, parse_cache)
+    # Calculate the problem's metrics once, for every strategy to reuse
+    get_problem_metrics(domain_file_path, problem_file_path, domain, problem, metrics_cache)
+    options['metrics_cache'] = metrics_cache
+
+    for strategy in strategies:
+        if multiprocessing.get_start_method() == 'fork':
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_run_forked_test,
+                                              args=((domain_file_path, problem_file_path, strategy),
+                                                    dict(options, domain=domain, problem=problem), sender))
+            process.start()
+            sender.close()
+            # Read progress until the child exits, so it never blocks on a full pipe
+            progress = {}
+            while True:
+                try:
+                    progress.update(receiver.recv())
+                except EOFError:
+                    break
+            receiver.close()
+            process.join()
+            if process.exitcode != 0:
+                print("Strategy {} on {} exited with code {}".format(strategy, problem_file_path, process.exitcode))
+                if not progress.get('written'):
+                    # As run_tests_parallel does for its workers (see parallelExperimentRunner.py)
+                    if 'status' in progress:
+                        status = progress['status']
+                    elif process.exitcode == -signal.SIGKILL:
+                        status = 'memout'   # Most likely killed by the kernel's out of memory killer
+                    else:
+                        status = 'error'
+                    write_failed_run(problem_file_path, strategy, status, progress, shard=options.get('shard'))
+        else:
+            # Copy the domain and problem together so the problem still refers to its own domain
+            domain_copy, problem_copy = copy.deepcopy((domain, problem))
+            run_test(domain_file_path, problem_file_path, strategy, domain=domain_copy, problem=problem_copy,
+                     **options)
+
+
+def _run_forked_test(test, options, connection):
+    """
+    :param test: (domain file path, problem file path, strategy)
+    :param options: Dictionary of keyword arguments passed on to run_test
+    :param connection: Connection progress reports are sent through, as well as to any report in options
+    :return: None
+
+    Target of the child processes started by run_strategies.
+    """
+    outer_report = options.get('report')
+
+    def report(progress):
+        connection.send(progress)
+        if outer_report is not None:
+            outer_report(progress)
+
+    try:
+        run_test(*test, **dict(options, report=report))
+    except MemoryError:
+        # Ran out of memory outside of the search (e.g. while calculating metrics)
+        connection.send({'status': 'memout'})
+        sys.exit(1)
+    except Exception:
+        connection.send({'status': 'error'})
+        raise
+
+
+def load_domain(domain_file_path, problem_file_path, parse_cache=False):
+    """
+    :param domain_file_path: String of file path of the domain file
+    :param problem_file_path: String of file path of any problem of the domain
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :return: Domain object parsed from the domain file
+
+    Lets the domain of several problems be parsed once and passed to run_test for each of them.
+    """
+    if parse_cache:
+        domain = parseCache.load_domain(domain_file_path)
+        if domain is not None:
+            return domain
+    controller = Runner(domain_file_path, problem_file_path)
+    controller.parse_domain()
+    if parse_cache:
+        parseCache.save_domain(domain_file_path, controller.domain)
+    return controller.domain
+
+
+def load_problem(domain_file_path, problem_file_path, domain=None, parse_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param domain: Domain object already parsed from domain_file_path (None to parse the domain file). It may be
+    modified while parsing the problem, so a copy should be given if it is used elsewhere.
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :return: (Domain object, Problem object)
+
+    Lets a problem be parsed once and passed to run_test for several strategies.
+    """
+    controller = Runner(domain_file_path, problem_file_path)
+    parse_files(controller, domain_file_path, problem_file_path, domain, parse_cache)
+    return controller.domain, controller.problem
 
 
 def calculate_all_possible_facts_and_pairings(domain, problem, model):
@@ -161,46 +496,102 @@ def calculate_all_possible_facts_and_pairings(domain, problem, model):
     :param problem: Problem object
     :param model: Model object
     :return: (amount of possible facts, amount of possible fact pairings, amount of actual pairings)
+
+    Facts are counted rather than grounded - a predicate has as many possible facts as the product of the amount of
+    objects which can fill each of its parameters, looked up in the problem's type index (see typeIndex.py).
     """
+    type_index = get_type_index(problem)
+
     # For each predicate in the domain
-    possible_facts = []
-    total_possible_pairs = 0
-    total_actual_pairs = 0
+    num_possible_facts = 0
     for predicate in domain.predicates:
         predicate = domain.get_predicate(predicate)
-        parameter_options = []
-
-        # For each parameter get a list of possible objects
-        if predicate.parameters:
-            for param in predicate.parameters:
-                valid_obs = []
-                param_type = param.type
-                for ob in problem.get_all_objects():
-                    ob = problem.get_object(ob)
-                    type_satisfied = ParameterSelector.check_satisfies_type(param_type, ob)
-                    if type_satisfied:
-                        valid_obs.append(ob)
-                parameter_options.append(valid_obs)
-        else:
-            parameter_options.append([])
+        if not predicate.parameters:
+            # Grounding a predicate without parameters used to produce no facts, keep counting it as none
+            continue
 
-        # Use itertools to get all combinations
-        all_param_combinations = list(itertools.product(*parameter_options))
-        predicate_all_combinations = []
-        for combination in all_param_combinations:
-            predicate_all_combinations.append(ProblemPredicate(predicate, list(combination)))
+        # For each parameter count the possible objects
+        num_predicate_facts = 1
+        for param in predicate.parameters:
+            num_predicate_facts *= type_index.count(param.type)
 
-        possible_facts += predicate_all_combinations
+        num_possible_facts += num_predicate_facts
 
     # Now calculate all possible pairs
-    total_possible_pairs = comb(len(possible_facts), 2)
+    total_possible_pairs = comb(num_possible_facts, 2)
     if model is not None:
         total_actual_pairs = comb(len(model.current_state.elements), 2)
     else:
         total_actual_pairs = 'N/A'
 
-    # Return all possible facts
-    return possible_facts, total_possible_pairs, total_actual_pairs
+    return num_possible_facts, total_possible_pairs, total_actual_pairs
+
+
+def calculate_problem_metrics(domain, problem):
+    """
+    :param domain: Domain object
+    :param problem: Problem object
+    :return: Dictionary of metrics of the problem which do not depend on the strategy - 'all_facts',
+    'possible_pairs', 'num_objects' and 'num_predicates'
+    """
+    num_possible_facts, total_possible_pairs, _ = calculate_all_possible_facts_and_pairings(domain, problem, None)
+    return {'all_facts': num_possible_facts, 'possible_pairs': total_possible_pairs,
+            'num_objects': len(problem.get_all_objects()), 'num_predicates': len(domain.predicates)}
+
+
+def get_problem_metrics(domain_file_path, problem_file_path, domain, problem, metrics_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param domain: Domain object parsed from domain_file_path
+    :param problem: Problem object parsed from problem_file_path
+    :param metrics_cache: Boolean - use the problem metrics cache (see problemMetricsCache.py)
+    :return: Dictionary of metrics of the problem (see calculate_problem_metrics)
+
+    Metrics calculated in this process are remembered, so several strategies run on a problem in one process (or
+    forked from it, see run_strategies) only calculate them once.
+    """
+    key = (domain_file_path, problem_file_path)
+    if key not in _problem_metrics:
+        metrics = problemMetricsCache.load(domain_file_path, problem_file_path) if metrics_cache else None
+        if metrics is None:
+            metrics = calculate_problem_metrics(domain, problem)
+            if metrics_cache:
+                problemMetricsCache.save(domain_file_path, problem_file_path, metrics)
+        _problem_metrics[key] = metrics
+    return _problem_metrics[key]
+
+
+def get_known_problem_metrics(domain_file_path, problem_file_path, metrics_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param metrics_cache: Boolean - look in the problem metrics cache (see problemMetricsCache.py)
+    :return: Dictionary of metrics of the problem if they are known without calculating them (see
+    get_problem_metrics), otherwise None
+    """
+    key = (domain_file_path, problem_file_path)
+    if key not in _problem_metrics and metrics_cache:
+        metrics = problemMetricsCache.load(domain_file_path, problem_file_path)
+        if metrics is not None:
+            _problem_metrics[key] = metrics
+    return _problem_metrics.get(key)
+
+
+def get_results_header():
+    """
+    :return: String of header row of the results files written by write_to_file
+    """
+    return ('Problem,number_expansions,solve_time,setup_time,' +
+            'all_facts,actual_facts,percentage_facts,possible_pairs,' +
+            'actual_pairs,percentage_pairs,' +
+            'num_novel_states,num_not_novel_states,percentage_novel_states,' +
+            'num_unique_facts,' +
+            'num_novel_methods,num_not_novel_methods,' +
+            'num_novel_method_not_novel_state,num_novel_methods_novel_state,plan_operations,' +
+            'verify_wall_time,verify_cpu_time,verify_exit_code,search_overhead_time,peak_rss,top_allocations,' +
+            ','.join(phaseTimer.get_header()) + ',' +
+            'Status,Verified,Solved')
 
 
 def write_to_file(problem_name, number_expansions, solve_time, setup_time,
@@ -209,8 +600,10 @@ def write_to_file(problem_name, number_expansions, solve_time, setup_time,
                   num_novel_states, num_not_novel_states, percentage_novel_states,
                   num_unique_facts,
                   num_novel_methods, num_not_novel_methods,
-                  num_novel_method_not_novel_state, num_novel_methods_novel_state,
-                  solved, verified, file_name):
+                  num_novel_method_not_novel_state, num_novel_methods_novel_state, plan_operations,
+                  verify_wall_time, verify_cpu_time, verify_exit_code, search_overhead_time,
+                  peak_rss, top_allocations, phase_timer,
+                  status, solved, verified, file_name):
     """
     :param problem_name: String of problem name e.g. 'Rover/p02.hddl'
     :param number_expansions: Integer of expansions required to find a result
@@ -230,36 +623,52 @@ def write_to_file(problem_name, number_expansions, solve_time, setup_time,
     :param num_not_novel_methods: Integer of amount of NON-novel methods used
     :param num_novel_method_not_novel_state: Integer of amount of times a novel method was used on a non-novel state
     :param num_novel_methods_novel_state: Integer of amount of times a novel method was used on a novel state
+    :param plan_operations: Integer of amount of operations taken by the plan, or by the best partial model if no plan
+    was found
+    :param verify_wall_time: Float of time taken to verify the plan (seconds)
+    :param verify_cpu_time: Float of CPU time used by the plan verifier (seconds)
+    :param verify_exit_code: Integer of exit code of the plan verifier (negative if it was killed by a signal)
+    :param search_overhead_time: Float of time the search driver spent outside the planner's search steps (seconds,
+    see searchDriver.py)
+    :param peak_rss: Integer of bytes of peak resident memory of the run (see memoryMonitor.py)
+    :param top_allocations: String of the allocation sites holding the most memory, separated by ';'
+    :param phase_timer: PhaseTimer of the run (see phaseTimer.py), its wall and CPU time of each phase are written
+    ('N/A' for every phase if None). Opening the results file and waiting for its lock is timed as the write phase.
+    :param status: String of outcome of the search - 'solved', 'unsolved', 'timeout', 'memout' or 'error'
     :param solved: Boolean - was problem solved
     :param verified: Boolean - was problem verified
-    :param file_name: String of file name to write results to
+    :param file_name: String of file name to write results to. If the file has a header for different columns (it
+    was written by an older version), the row is written to a new version of the file instead e.g. 'X-results.v2.csv'
     :return: None
     """
-    if os.path.exists(file_name):
-        # If file exists open it and append
-        write_file = open(file_name, 'a')
+    # Check if the file we are writing to is within a subdirectory
+    if '/' in file_name:
+        target_folder = file_name[:file_name.rfind('/')]     # Get name of target subdirectory
+        # If subdirectory does not exist, create it
+        os.makedirs(target_folder, exist_ok=True)
+
+    # Open in append mode and hold an exclusive lock while writing, so several processes can share one results file
+    if phase_timer is not None:
+        phase_timer.start('write')
+    versioned_file_name = find_results_file(file_name, get_results_header())
+    if versioned_file_name != file_name and versioned_file_name not in _reported_versions:
+        print("{} has the columns of an older version, writing to {}".format(file_name, versioned_file_name))
+        _reported_versions.add(versioned_file_name)
+    write_file = open(versioned_file_name, 'a')
+    if fcntl is not None:
+        fcntl.flock(write_file, fcntl.LOCK_EX)
+    if phase_timer is not None:
+        phase_timer.stop('write')
+        phase_times = ','.join(str(time_taken) for time_taken in phase_timer.get_columns())
     else:
-        # Check if the file we are writing to is within a subdirectory
-        if '/' in file_name:
-            target_folder = file_name.split('/')[0]     # Get name of target subdirectory
-            # If subdirectory does not exist, create it
-            if not os.path.exists(target_folder):
-                os.mkdir(target_folder)
-
-        # File does not exist, make one
-        write_file = open(file_name, 'w')
-        write_file.write(
-            'Problem,number_expansions,solve_time,setup_time,' +
-            'all_facts,actual_facts,percentage_facts,possible_pairs,' +
-            'actual_pairs,percentage_pairs,' +
-            'num_novel_states,num_not_novel_states,percentage_novel_states,' +
-            'num_unique_facts,' +
-            'num_novel_methods,num_not_novel_methods,' +
-            'num_novel_method_not_novel_state,num_novel_methods_novel_state,' +
-            'Verified,Solved')
+        phase_times = ','.join('N/A' for _ in phaseTimer.get_header())
+    write_file.seek(0, os.SEEK_END)
+    if write_file.tell() == 0:
+        # File is empty, write header
+        write_file.write(get_results_header())
     # Write data to file
     write_file.write(
-        "\n{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{}".format(problem_name, number_expansions,
+        "\n{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{},{}".format(problem_name, number_expansions,
                                                                                solve_time, setup_time,
                                                                                all_possible_facts,
                                                                                actual_facts, percentage_facts,
@@ -274,21 +683,242 @@ def write_to_file(problem_name, number_expansions, solve_time, setup_time,
                                                                                num_not_novel_methods,
                                                                                num_novel_method_not_novel_state,
                                                                                num_novel_methods_novel_state,
-                                                                               str(verified), solved))
+                                                                               plan_operations,
+                                                                               verify_wall_time,
+                                                                               verify_cpu_time, verify_exit_code,
+                                                                               search_overhead_time,
+                                                                               peak_rss, top_allocations, phase_times,
+                                                                               status, str(verified), solved))
+    write_file.flush()
+    if fcntl is not None:
+        fcntl.flock(write_file, fcntl.LOCK_UN)
     write_file.close()
+    if file_name in _completed_problems:
+        _completed_problems[file_name].add(problem_name)
+
+
+# Problems recorded in each results file, see get_completed_problems
+_completed_problems = {}
+
+# Versioned results files this process has said it is writing to, see write_to_file
+_reported_versions = set()
+
+# Metrics of the problems run by this process, see get_problem_metrics
+_problem_metrics = {}
+
+
+def repair_results_file(file_name):
+    """
+    :param file_name: String of path of a results file
+    :return: Boolean - was a partially written row removed
+
+    A job killed while writing a row leaves a partial row at the end of the results file. This removes it, so the
+    next row written starts on a clean line.
+    """
+    if not os.path.exists(file_name):
+        return False
+    with open(file_name, 'rb+') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        content = file.read()
+        lines = content.decode(errors='replace').split('\n')
+        header = next((line for line in lines if is_header_row(line)), None)
+        last_line = lines[-1]
+        repaired = False
+        if header is not None and last_line != header:
+            # Every complete row ends with the value of 'Solved' and has a value for each column - either of the file's
+            # header or, for rows written under an older header before results files were versioned, of the current
+            # columns (see get_results_header)
+            complete = last_line[last_line.rfind(',') + 1:] in ('True', 'False') and \
+                last_line.count(',') in (header.count(','), get_results_header().count(','))
+            if not complete:
+                file.truncate(content.rfind(b'\n'))
+                repaired = True
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_UN)
+    if repaired:
+        print("Removed partially written row from {}: {}".format(file_name, last_line))
+    return repaired
 
 
+def get_completed_problems(file_name):
+    """
+    :param file_name: String of path of a results file
+    :return: Set of names of the problems with a row in the results file e.g. {'Rover/p02.hddl'}
+
+    Every version of the results file (see calculateResultsStats.find_results_file) is read (and repaired, see
+    repair_results_file) the first time it is asked for. Problems run by this process are added to the set as their
+    rows are written.
+    """
+    if file_name not in _completed_problems:
+        _completed_problems[file_name] = set()
+        for versioned_file_name in get_results_versions(file_name):
+            repair_results_file(versioned_file_name)
+            _completed_problems[file_name] |= {row['Problem'] for row in read_results(versioned_file_name)}
+    return _completed_problems[file_name]
+
+
+def remove_completed_tests(tests, shard=None):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param shard: (shard index, shard count) if the tests are run as part of a shard
+    :return: List of tests which do not have a row in their strategy's results file
+
+    When running as part of a shard, both the shard's results file and the strategy's main results file (which shard
+    results are merged into) are checked.
+    """
+    remaining = []
+    for test in tests:
+        file_name = get_results_file_name(test[2])
+        completed = get_completed_problems(file_name)
+        if shard is not None:
+            completed = completed | get_completed_problems(shard_results_file_name(file_name, shard))
+        if get_problem_name(test[1]) not in completed:
+            remaining.append(test)
+    print("Resuming: skipping {} of {} problems already recorded".format(len(tests) - len(remaining), len(tests)))
+    return remaining
+
+
+def write_failed_run(problem_file_path, strategy, status, progress=None, shard=None):
+    """
+    :param problem_file_path: String of file path of the problem's problem file
+    :param strategy: Integer correlating to planner configuration
+    :param status: String of why the run failed - 'timeout', 'memout' or 'error'
+    :param progress: Dictionary of the last progress reported by run_test (None if nothing was reported)
+    :param shard: (shard index, shard count) if this problem was run as part of a shard
+    :return: None
+
+    Writes the results row for a run whose process was killed (or crashed) before writing its own row. When the
+    search reported its best partial model (see SearchDriver.get_progress), the row gives its operations and facts,
+    and the percentages of the problem's possible facts and pairs if the problem's metrics were reported too.
+    """
+    progress = progress if progress is not None else {}
+    file_name = get_results_file_name(strategy)
+    if shard is not None:
+        file_name = shard_results_file_name(file_name, shard)
+    all_facts = progress.get('all_facts', 'N/A')
+    actual_facts = progress.get('actual_facts', 'N/A')
+    possible_pairs = progress.get('possible_pairs', 'N/A')
+    actual_pairs = comb(actual_facts, 2) if actual_facts != 'N/A' else 'N/A'
+    percentage_facts = actual_facts / all_facts * 100 if 'N/A' not in (actual_facts, all_facts) and all_facts \
+        else 'N/A'
+    percentage_pairs = actual_pairs / possible_pairs * 100 if 'N/A' not in (actual_pairs, possible_pairs) and \
+        possible_pairs else 'N/A'
+    write_to_file(get_problem_name(problem_file_path), progress.get('num_expansions', 'N/A'),
+                  progress.get('solve_time', 'N/A'), progress.get('setup_time', 'N/A'),
+                  all_facts, actual_facts, percentage_facts, possible_pairs, actual_pairs, percentage_pairs,
+                  'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', progress.get('best_operations', 'N/A'),
+                  'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', None, status, False, 'N/A', file_name)
+
 if __name__ == "__main__":
+    from benchmarkManifest import add_selection_arguments, selection_arguments_given, select_problems, build_tests
+    from benchmarkSharding import parse_shard, get_slurm_shard_index, select_shard
+    from parallelExperimentRunner import run_tests, parse_memory
+    import planVerifier
+
     argparser = argparse.ArgumentParser()
     argparser.add_argument("strategy", metavar='S', type=int, nargs="?",
                            help='Number corresponding to strategy required',
                            default=None)
+    add_selection_arguments(argparser)
+    argparser.add_argument("--processes", type=int, help='Amount of problems to run at once', default=1)
+    argparser.add_argument("--shard", help='Only run shard i of n (i/n, i starts at 0) of the selected problems',
+                           default=None)
+    argparser.add_argument("--shards", type=int, default=None,
+                           help='Split the selected problems into this many shards and run the shard given by '
+                                'SLURM_ARRAY_TASK_ID')
+    argparser.add_argument("--time-limit", type=float, default=None,
+                           help='Seconds the search of each problem may run for, each problem is then run in its own '
+                                'process which is killed if it overruns')
+    argparser.add_argument("--memory-limit", type=parse_memory, default=None,
+                           help='Memory (e.g. 20G) each problem may use, each problem is then run in its own process')
+    argparser.add_argument("--resume", action='store_true',
+                           help='Skip problems which already have a row in the results file')
+    argparser.add_argument("--parse-cache", action='store_true',
+                           help='Reuse parsed domains and problems cached on disk by previous runs')
+    argparser.add_argument("--metrics-cache", action='store_true',
+                           help='Reuse strategy independent problem metrics cached on disk by previous runs')
+    argparser.add_argument("--save-final-states", action='store_true',
+                           help='Save the facts of each final state to results/final-states for offline comparison')
+    argparser.add_argument("--coverage-interval", type=int, default=0, metavar='N',
+                           help='Every N expansions add the facts of the frontier to a coverage series saved to '
+                                'results/coverage')
+    argparser.add_argument("--pair-interval", type=int, default=0, metavar='N',
+                           help='Every N expansions add the fact pairs of the frontier to a pair coverage series saved '
+                                'to results/pairs')
+    argparser.add_argument("--telemetry-interval", type=int, default=0, metavar='N',
+                           help='Every N expansions sample the progress of the search to results/telemetry')
+    argparser.add_argument("--telemetry-seconds", type=float, default=0, metavar='T',
+                           help='Every T seconds sample the progress of the search to results/telemetry')
+    argparser.add_argument("--trace-allocations", type=int, default=0, metavar='N',
+                           help='Trace allocations and record the N sites holding the most memory (slows the search)')
+    argparser.add_argument("--track-best-partial", action='store_true',
+                           help='If no plan is found, record the model with the most operations ever added to the '
+                                'frontier rather than the most in the final frontier')
+    argparser.add_argument("--async-verify", type=int, default=0, metavar='N',
+                           help='Verify plans with N background workers while the next problem is searched')
+    argparser.add_argument("--verify-cache", action='store_true',
+                           help='Reuse verification results of identical plans cached on disk by previous runs')
+    argparser.add_argument("--verify-time-limit", type=float, default=planVerifier.VERIFY_TIME_LIMIT,
+                           help='Seconds the plan verifier may run for before it is killed')
+    argparser.add_argument("--verify-memory-limit", type=parse_memory, default=None,
+                           help='Memory (e.g. 4G) the plan verifier may use')
+    argparser.add_argument("--no-external-verify", action='store_true',
+                           help='Do not run the plan verifier (Verified is then N/A)')
     args = argparser.parse_args()
     strategy = args.strategy
+    planVerifier.VERIFY_TIME_LIMIT = args.verify_time_limit
+    planVerifier.VERIFY_MEMORY_LIMIT = args.verify_memory_limit
+
+    shard = None
+    if args.shard is not None:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            argparser.error(str(e))
+    elif args.shards is not None:
+        shard_index = get_slurm_shard_index()
+        if shard_index is None:
+            argparser.error("--shards requires SLURM_ARRAY_TASK_ID to be set, use --shard i/n otherwise")
+        try:
+            shard = parse_shard("{}/{}".format(shard_index, args.shards))
+        except ValueError as e:
+            argparser.error(str(e))
+
+    if selection_arguments_given(args) or shard is not None:
+        # Manifest driven run - discover problems rather than using the hard-coded list below
+        problems, strategies = select_problems(args)
+        if strategy is not None:
+            strategies = [strategy]
+        if strategies is None:
+            argparser.error("Incorrect Usage. Strategy MUST be set!")
+
+        tests = build_tests(problems, strategies)
+        if shard is not None:
+            tests = select_shard(tests, shard)
+            print("Running shard {} of {}: {} problems".format(shard[0], shard[1], len(tests)))
+        if args.resume:
+            tests = remove_completed_tests(tests, shard)
+        run_tests(tests, args.processes, args.time_limit, args.memory_limit, shard=shard, parse_cache=args.parse_cache,
+                  verification_workers=args.async_verify, verify_cache=args.verify_cache,
+                  external_verify=not args.no_external_verify,
+                  metrics_cache=args.metrics_cache, save_final_states=args.save_final_states,
+                  coverage_interval=args.coverage_interval, pair_interval=args.pair_interval,
+                  telemetry_interval=args.telemetry_interval, telemetry_seconds=args.telemetry_seconds,
+                  trace_allocations=args.trace_allocations, track_best_partial=args.track_best_partial)
+        sys.exit(0)
 
     if strategy is None:
         argparser.error("Incorrect Usage. Strategy MUST be set!")
 
+    run_test = partial(run_test, resume=args.resume, parse_cache=args.parse_cache,
+                       verification_workers=args.async_verify, verify_cache=args.verify_cache,
+                       external_verify=not args.no_external_verify,
+                       metrics_cache=args.metrics_cache, save_final_states=args.save_final_states,
+                       coverage_interval=args.coverage_interval, pair_interval=args.pair_interval,
+                       telemetry_interval=args.telemetry_interval, telemetry_seconds=args.telemetry_seconds,
+                       trace_allocations=args.trace_allocations, track_best_partial=args.track_best_partial)
+
     # Rover Problems
     # run_test("../../Examples/Rover/domain.hddl", "../../Examples/Rover/p01.hddl", strategy)
     # run_test("../../Examples/Rover/domain.hddl", "../../Examples/Rover/p01.hddl", strategy)
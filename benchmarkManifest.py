@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import shlex
+
+# Default location of the EPICpy example problems
+EXAMPLES_PATH = '../EPICpy/Tests/Examples'
+
+# Problem size tiers, based on the size of the problem file (bytes). A problem belongs to the first tier whose
+# upper bound is larger than the size of its file.
+SIZE_TIERS = [('small', 10000), ('medium', 100000), ('large', float('inf'))]
+
+
+def natural_sort_key(text):
+    """
+    :param text: String to be sorted
+    :return: List which sorts 'p2.hddl' before 'p10.hddl'
+    """
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', text)]
+
+
+def discover_problems(examples_path=EXAMPLES_PATH):
+    """
+    :param examples_path: String of path to folder containing one folder per domain
+    :return: List of (domain file path, problem file path) tuples
+
+    Every folder containing a 'domain.hddl' file is treated as a domain. Every other '.hddl' file in that folder
+    is treated as a problem of that domain.
+    """
+    problems = []
+    for domain_name in sorted(os.listdir(examples_path), key=natural_sort_key):
+        domain_folder = examples_path + '/' + domain_name
+        domain_file_path = domain_folder + '/domain.hddl'
+        if not os.path.isfile(domain_file_path):
+            continue
+        for file_name in sorted(os.listdir(domain_folder), key=natural_sort_key):
+            if file_name.endswith('.hddl') and file_name != 'domain.hddl':
+                problems.append((domain_file_path, domain_folder + '/' + file_name))
+    return problems
+
+
+def get_problem_name(problem_file_path):
+    """
+    :param problem_file_path: String of file path of a problem file
+    :return: String of problem name as recorded in results files e.g. 'Rover/p02.hddl'
+    """
+    return '/'.join(problem_file_path.split('/')[-2:])
+
+
+def get_size_tier(problem_file_path):
+    """
+    :param problem_file_path: String of file path of a problem file
+    :return: String of size tier the problem belongs to
+    """
+    size = os.path.getsize(problem_file_path)
+    for tier, upper_bound in SIZE_TIERS:
+        if size < upper_bound:
+            return tier
+
+
+def filter_problems(problems, domains=None, pattern=None, exclude=None, size_tiers=None):
+    """
+    :param problems: List of (domain file path, problem file path) tuples
+    :param domains: List of domain folder names to keep e.g. ['Rover', 'Barman'] (None keeps all domains)
+    :param pattern: String of regex which problem names (e.g. 'Rover/p02.hddl') must match (None keeps all problems)
+    :param exclude: String of regex, problems whose names match are removed (None removes nothing)
+    :param size_tiers: List of size tiers to keep e.g. ['small', 'medium'] (None keeps all sizes)
+    :return: List of (domain file path, problem file path) tuples which satisfy every filter
+    """
+    valid_tiers = [tier for tier, _ in SIZE_TIERS]
+    if size_tiers is not None:
+        for tier in size_tiers:
+            if tier not in valid_tiers:
+                raise ValueError("Unknown size tier '{}', expected one of {}".format(tier, valid_tiers))
+
+    pattern = re.compile(pattern) if pattern is not None else None
+    exclude = re.compile(exclude) if exclude is not None else None
+
+    filtered = []
+    for domain_file_path, problem_file_path in problems:
+        problem_name = get_problem_name(problem_file_path)
+        if domains is not None and problem_name.split('/')[0] not in domains:
+            continue
+        if pattern is not None and not pattern.search(problem_name):
+            continue
+        if exclude is not None and exclude.search(problem_name):
+            continue
+        if size_tiers is not None and get_size_tier(problem_file_path) not in size_tiers:
+            continue
+        filtered.append((domain_file_path, problem_file_path))
+    return filtered
+
+
+def build_tests(problems, strategies):
+    """
+    :param problems: List of (domain file path, problem file path) tuples
+    :param strategies: List of integers correlating to planner configurations
+    :return: List of (domain file path, problem file path, strategy) tuples, grouped by strategy
+    """
+    return [(domain_file_path, problem_file_path, strategy)
+            for strategy in strategies for domain_file_path, problem_file_path in problems]
+
+
+def load_manifest(manifest_file_path):
+    """
+    :param manifest_file_path: String of file path of a JSON manifest
+    :return: (List of (domain file path, problem file path) tuples, List of strategies (None if not set))
+
+    A manifest is a JSON object with the following optional keys:
+    examples_path - folder to discover problems in (defaults to EXAMPLES_PATH)
+    domains, pattern, exclude, size_tiers - filters, see filter_problems
+    strategies - list of strategy numbers to run
+    """
+    with open(manifest_file_path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    unknown_keys = set(manifest.keys()) - {'examples_path', 'domains', 'pattern', 'exclude', 'size_tiers',
+                                           'strategies'}
+    if unknown_keys:
+        raise ValueError("Unknown keys in manifest {}: {}".format(manifest_file_path, sorted(unknown_keys)))
+
+    problems = discover_problems(manifest.get('examples_path', EXAMPLES_PATH))
+    problems = filter_problems(problems, domains=manifest.get('domains'), pattern=manifest.get('pattern'),
+                               exclude=manifest.get('exclude'), size_tiers=manifest.get('size_tiers'))
+    return problems, manifest.get('strategies')
+
+
+# Command line options used to select problems, see add_selection_arguments
+SELECTION_OPTIONS = ['manifest', 'examples_path', 'domain', 'pattern', 'exclude', 'size']
+
+
+def add_selection_arguments(argparser):
+    """
+    :param argparser: ArgumentParser to add the problem selection options to
+    :return: None
+    """
+    argparser.add_argument("--manifest", help='JSON manifest describing the problems (and strategies) to run',
+                           default=None)
+    argparser.add_argument("--examples-path", help='Folder to discover domains and problems in',
+                           default=None)
+    argparser.add_argument("--domain", action='append', help='Only run problems of this domain (repeatable)',
+                           default=None)
+    argparser.add_argument("--pattern", help='Only run problems whose name (e.g. Rover/p02.hddl) matches this regex',
+                           default=None)
+    argparser.add_argument("--exclude", help='Skip problems whose name matches this regex', default=None)
+    argparser.add_argument("--size", action='append', choices=[tier for tier, _ in SIZE_TIERS],
+                           help='Only run problems of this size tier (repeatable)', default=None)
+
+
+def selection_arguments_given(args):
+    """
+    :param args: Namespace returned by an ArgumentParser set up by add_selection_arguments
+    :return: Boolean - was any problem selection option given
+    """
+    return any(getattr(args, option) is not None for option in SELECTION_OPTIONS)
+
+
+def select_problems(args):
+    """
+    :param args: Namespace returned by an ArgumentParser set up by add_selection_arguments
+    :return: (List of (domain file path, problem file path) tuples, List of strategies from the manifest (or None))
+    """
+    if args.manifest is not None:
+        problems, strategies = load_manifest(args.manifest)
+    else:
+        problems, strategies = discover_problems(args.examples_path or EXAMPLES_PATH), None
+    problems = filter_problems(problems, domains=args.domain, pattern=args.pattern, exclude=args.exclude,
+                               size_tiers=args.size)
+    return problems, strategies
+
+
+def selection_command_line(args):
+    """
+    :param args: Namespace returned by an ArgumentParser set up by add_selection_arguments
+    :return: String of command line options which select the same problems
+    """
+    options = []
+    for option in SELECTION_OPTIONS:
+        value = getattr(args, option)
+        if value is None:
+            continue
+        flag = '--' + option.replace('_', '-')
+        for item in (value if isinstance(value, list) else [value]):
+            options += [flag, shlex.quote(str(item))]
+    return ' '.join(options)
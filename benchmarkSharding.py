@@ -0,0 +1,146 @@
+import os
+import heapq
+import statistics
+from benchmarkManifest import get_problem_name
+from calculateResultsStats import read_results, get_unversioned_file_name
+from ExperiementRunnerPlannerSetup import get_results_file_name
+
+# Folder results files are read from when predicting the cost of a problem
+RESULTS_FOLDER = 'results'
+
+
+def parse_shard(shard_text):
+    """
+    :param shard_text: String of the form 'i/n' e.g. '3/8'
+    :return: (shard index, shard count) - shard indexes start at 0
+    """
+    try:
+        shard_index, shard_count = [int(part) for part in shard_text.split('/')]
+    except ValueError:
+        raise ValueError("Shard must be of the form i/n, not '{}'".format(shard_text))
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError("Shard index must be between 0 and {}, not {}".format(shard_count - 1, shard_index))
+    return shard_index, shard_count
+
+
+def get_slurm_shard_index():
+    """
+    :return: Integer of this job's position within its SLURM job array (None if not in a job array)
+    """
+    if 'SLURM_ARRAY_TASK_ID' not in os.environ:
+        return None
+    return int(os.environ['SLURM_ARRAY_TASK_ID']) - int(os.environ.get('SLURM_ARRAY_TASK_MIN', 0))
+
+
+def shard_results_file_name(file_name, shard):
+    """
+    :param file_name: String of path where results for a strategy are recorded e.g. 'results/Landmarks-results.csv'
+    :param shard: (shard index, shard count)
+    :return: String of path where the shard's results are recorded e.g.
+    'results/shards/Landmarks-results.shard-3-of-8.csv'
+
+    Shards write to their own files so that the history used to balance the shards does not change while the
+    shards are running.
+    """
+    folder, base_name = os.path.split(file_name)
+    base_name, extension = os.path.splitext(base_name)
+    return os.path.join(folder, 'shards', '{}.shard-{}-of-{}{}'.format(base_name, shard[0], shard[1], extension))
+
+
+def read_historic_times(results_folder=RESULTS_FOLDER):
+    """
+    :param results_folder: String of folder containing results files
+    :return: Dictionary mapping results file path (rows of every version of a results file are under the path of
+    its first version) -> problem name -> list of times (setup + solve, seconds)
+    """
+    history = {}
+    if not os.path.isdir(results_folder):
+        return history
+    for file_name in sorted(os.listdir(results_folder)):
+        if not file_name.endswith('.csv'):
+            continue
+        file_path = os.path.normpath(results_folder + '/' + file_name)
+        strategy_file_path = get_unversioned_file_name(file_path)     # Every version holds the same strategy's rows
+        for row in read_results(file_path):
+            try:
+                time_taken = float(row['solve_time']) + float(row['setup_time'])
+            except (KeyError, ValueError):
+                continue
+            history.setdefault(strategy_file_path, {}).setdefault(row['Problem'], []).append(time_taken)
+    return history
+
+
+def predict_costs(tests, results_folder=RESULTS_FOLDER):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param results_folder: String of folder containing results files
+    :return: List of predicted costs (seconds), one per test
+
+    The cost of a test is the mean historic time taken by the same strategy on the problem. If the strategy has not
+    attempted the problem, the mean over every strategy which has is used. Otherwise the cost is estimated from the
+    size of the problem file, using the median time taken per byte of the problems which do have a history.
+    """
+    history = read_historic_times(results_folder)
+
+    # Mean time per problem across all strategies
+    all_strategy_times = {}
+    for problem_times in history.values():
+        for problem_name, times in problem_times.items():
+            all_strategy_times.setdefault(problem_name, []).extend(times)
+
+    costs = []
+    sizes = []
+    seconds_per_byte = []
+    results_file_names = {}
+    for domain_file_path, problem_file_path, strategy in tests:
+        if strategy not in results_file_names:
+            results_file_names[strategy] = os.path.normpath(get_results_file_name(strategy))
+        problem_name = get_problem_name(problem_file_path)
+        size = os.path.getsize(problem_file_path)
+        sizes.append(size)
+
+        strategy_times = history.get(results_file_names[strategy], {}).get(problem_name)
+        if strategy_times:
+            cost = statistics.mean(strategy_times)
+        elif problem_name in all_strategy_times:
+            cost = statistics.mean(all_strategy_times[problem_name])
+        else:
+            cost = None
+        if cost is not None and size > 0:
+            seconds_per_byte.append(cost / size)
+        costs.append(cost)
+
+    # Estimate the cost of problems with no history from their size
+    size_scale = statistics.median(seconds_per_byte) if seconds_per_byte else 1
+    return [cost if cost is not None else size * size_scale for cost, size in zip(costs, sizes)]
+
+
+def shard_tests(tests, shard_count, costs):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param shard_count: Integer of amount of shards to split the tests into
+    :param costs: List of predicted costs, one per test
+    :return: List of shard_count lists of tests
+
+    Tests are assigned, most expensive first, to the shard with the lowest total predicted cost. Ties are broken by
+    test and shard index, so every job computes the same split. Within a shard the tests keep their original order.
+    """
+    order = sorted(range(len(tests)), key=lambda i: (-costs[i], tests[i][1], tests[i][2]))
+    loads = [(0, shard_index) for shard_index in range(shard_count)]
+    assigned = [[] for _ in range(shard_count)]
+    for i in order:
+        load, shard_index = heapq.heappop(loads)
+        assigned[shard_index].append(i)
+        heapq.heappush(loads, (load + costs[i], shard_index))
+    return [[tests[i] for i in sorted(indexes)] for indexes in assigned]
+
+
+def select_shard(tests, shard, results_folder=RESULTS_FOLDER):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param shard: (shard index, shard count)
+    :param results_folder: String of folder containing results files
+    :return: List of tests belonging to the shard
+    """
+    shard_index, shard_count = shard
+    return shard_tests(tests, shard_count, predict_costs(tests, results_folder))[shard_index]
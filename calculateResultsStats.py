@@ -1,5 +1,137 @@
 import re
+import csv
 import math
+import os
+try:
+    import fcntl    # Used to lock results files - not available on Windows
+except ImportError:
+    fcntl = None
+
+
+def is_header_row(line):
+    """
+    :param line: String of a line of a results file
+    :return: Boolean - is the line the file's header row
+
+    The summary calculate_stats writes above the header lists each domain as 'Domain (attempted): score', so a
+    summary line for a file whose first column was mistaken for a domain (e.g. 'Problem,...,Solved (1): 0', written
+    by calculate_stats before it replaced previous summaries) is not taken for the header.
+    """
+    return line.startswith('Problem,') and re.search(r' \(\d+\): \S+$', line) is None
+
+
+def find_header_index(lines):
+    """
+    :param lines: List of strings of the lines of a results file
+    :return: Integer index of the header row in lines (None if there is none)
+    """
+    for i, line in enumerate(lines):
+        if is_header_row(line):
+            return i
+    return None
+
+
+def read_results(results_file_name):
+    """
+    :param results_file_name: String of file path to open
+    :return: List of dictionaries, one per complete row, mapping column name to value
+
+    Summary lines written by calculate_stats above the header are skipped, as are rows which do not have a value
+    for every column (e.g. a row left partially written by a job which was killed).
+
+    Rows with more values than the header, which end with a value of 'Solved', were written with columns added since
+    the header was written (before results files were versioned, see find_results_file). Columns are only ever added
+    before the trailing Status, Verified and Solved columns, so the header's other columns are read from the start of
+    the row and those from its end.
+    """
+    if not os.path.exists(results_file_name):
+        return []
+
+    with open(results_file_name, 'r', newline='') as file:
+        lines = file.read().splitlines()
+
+    # Find the header row - calculate_stats inserts a summary above it
+    header_index = find_header_index(lines)
+    if header_index is None:
+        return []
+
+    reader = csv.reader(lines[header_index:])
+    header = next(reader)
+    trailing = [column for column in header[-3:] if column in ('Status', 'Verified', 'Solved')]
+    rows = []
+    for values in reader:
+        if len(values) == len(header):
+            rows.append(dict(zip(header, values)))
+        elif len(values) > len(header) and trailing and values[-1] in ('True', 'False'):
+            row = dict(zip(header[:-len(trailing)], values))
+            row.update(zip(trailing, values[-len(trailing):]))
+            rows.append(row)
+    return rows
+
+
+def read_header(results_file_name):
+    """
+    :param results_file_name: String of file path to open
+    :return: String of the file's header row (None if the file does not exist or has no header)
+    """
+    if not os.path.exists(results_file_name):
+        return None
+    with open(results_file_name, 'r', newline='') as file:
+        for line in file:
+            if is_header_row(line.rstrip('\r\n')):
+                return line.rstrip('\r\n')
+    return None
+
+
+def get_versioned_file_name(results_file_name, version):
+    """
+    :param results_file_name: String of path where results for a strategy are recorded e.g. 'results/X-results.csv'
+    :param version: Integer of version of the results file's columns, starting at 1
+    :return: String of path of that version of the results file e.g. 'results/X-results.v2.csv' (results_file_name
+    for version 1)
+    """
+    if version == 1:
+        return results_file_name
+    base_name, extension = os.path.splitext(results_file_name)
+    return '{}.v{}{}'.format(base_name, version, extension)
+
+
+def get_unversioned_file_name(results_file_name):
+    """
+    :param results_file_name: String of path of any version of a results file e.g. 'results/X-results.v2.csv'
+    :return: String of path of the first version e.g. 'results/X-results.csv'
+    """
+    return re.sub(r'\.v\d+(\.csv)$', r'\1', results_file_name)
+
+
+def get_results_versions(results_file_name):
+    """
+    :param results_file_name: String of path where results for a strategy are recorded
+    :return: List of paths of the versions of the results file which exist, oldest first
+    """
+    versions = []
+    while os.path.exists(get_versioned_file_name(results_file_name, len(versions) + 1)):
+        versions.append(get_versioned_file_name(results_file_name, len(versions) + 1))
+    return versions
+
+
+def find_results_file(results_file_name, header):
+    """
+    :param results_file_name: String of path where results for a strategy are recorded
+    :param header: String of header row of the rows to be written
+    :return: String of path of the version of the results file the rows should be written to - the first version
+    which is empty or has the same header
+
+    Results files written before columns were added keep their rows, new rows are written to a new version of the
+    file (e.g. 'results/X-results.v2.csv') rather than under a header they do not match.
+    """
+    version = 1
+    while True:
+        versioned_file_name = get_versioned_file_name(results_file_name, version)
+        existing_header = read_header(versioned_file_name)
+        if existing_header is None or existing_header == header:
+            return versioned_file_name
+        version += 1
 
 
 def calculate_stats(results_file_name):
@@ -7,42 +139,47 @@ def calculate_stats(results_file_name):
     :param results_file_name: String of file path to open
     :return:
 
-    This function opens a results file and summarises the amount of problems solved per domain
+    This function opens a results file and summarises the amount of problems solved per domain. The summary is
+    written above the header, replacing any summary a previous call wrote, so a file can be summarised again after
+    more rows are added to it.
     """
     file = open(results_file_name, 'r+')
-    file_content = file.read()  # Read the file
-    file.seek(0, 0)     # Move pointer to start of the file
-    line_num = 1
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_EX)    # Rows may be appended while the summary is written
+    lines = file.read().splitlines()    # Read the file
+    header_index = find_header_index(lines)
+    if header_index is None:
+        header_index = 0
     solved_problems = 0
     total_problems = 0
     domains = {}
 
-    for line in file:   # Row in CSV file
-        if line_num > 1:    # Check if we are looking at the header row
-            solved = line[line.rfind(',') + 1:line.rfind('\\')]     # Get value in the last column of row
-            problem_domain = line[:line.find('/')]      # Get value in the first column of row
-            if solved.upper() == 'TRUE':
-                solved_problems += 1
-                commas = [m.start() for m in re.finditer(',', line)]    # Find all commas in row
-                solve_time = float(line[commas[1] + 1:commas[2]])   # Locate solve time
-                # Calculate score for problem using the IPC's scoring method
-                if solve_time < 1:
-                    problem_score = 1
-                else:
-                    problem_score = min(1, 1 - (math.log(solve_time) / math.log(1800)))
+    for line in lines[header_index + 1:]:   # Row in CSV file, after any previous summary and the header row
+        if not line:
+            continue
+        solved = line[line.rfind(',') + 1:]     # Get value in the last column of row
+        problem_domain = line[:line.find('/')]      # Get value in the first column of row
+        if solved.upper() == 'TRUE':
+            solved_problems += 1
+            commas = [m.start() for m in re.finditer(',', line)]    # Find all commas in row
+            solve_time = float(line[commas[1] + 1:commas[2]])   # Locate solve time
+            # Calculate score for problem using the IPC's scoring method
+            if solve_time < 1:
+                problem_score = 1
             else:
-                problem_score = 0
+                problem_score = min(1, 1 - (math.log(solve_time) / math.log(1800)))
+        else:
+            problem_score = 0
 
-            # If we have a new domain, create new entry in dictionary
-            if problem_domain not in domains.keys():
-                domains[problem_domain] = []
-            domains[problem_domain].append(problem_score)   # Add score to list for domain
-            total_problems += 1
-        line_num += 1
+        # If we have a new domain, create new entry in dictionary
+        if problem_domain not in domains.keys():
+            domains[problem_domain] = []
+        domains[problem_domain].append(problem_score)   # Add score to list for domain
+        total_problems += 1
 
-    file.seek(0, 0)     # Move pointer back to start of file
     # Generate general summary string
-    overview_string = "Total_Problems: {},Solved_Problems: {}, Percentage_Solved: {}\n".format(total_problems, solved_problems, (solved_problems / total_problems) * 100)
+    overview_string = "Total_Problems: {},Solved_Problems: {}, Percentage_Solved: {}\n".format(
+        total_problems, solved_problems, (solved_problems / total_problems) * 100 if total_problems else 0)
 
     total_score = 0
     domain_score_string = ""
@@ -54,7 +191,11 @@ def calculate_stats(results_file_name):
 
     domain_score_string += "Total Score: {}\n".format(total_score)
 
-    file.write(overview_string + domain_score_string + file_content)
+    file.seek(0, 0)     # Move pointer back to start of file
+    file.write(overview_string + domain_score_string + '\n'.join(lines[header_index:]))
+    file.truncate()
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_UN)
     print(overview_string)
     file.close()
 
@@ -1,5 +1,6 @@
 import os
 import sys
+from functools import partial
 
 # Set the path to EPICpy
 global EPICpy_Path
@@ -17,3 +18,24 @@ sys.path.append(os.getcwd())
 
 print(sys.path)
 from ExperimentRunner import run_test
+
+# 'python3 ERX.py --resume' skips problems which already have a row in the results file
+# 'python3 ERX.py --parse-cache' reuses parsed domains and problems cached on disk by previous runs
+# 'python3 ERX.py --metrics-cache' reuses strategy independent problem metrics cached on disk by previous runs
+# 'python3 ERX.py --save-final-states' saves the facts of each final state to results/final-states
+# 'python3 ERX.py --coverage' records the fact coverage of the frontier every 1000 expansions in results/coverage
+# 'python3 ERX.py --pairs' records the fact pair coverage of the frontier every 1000 expansions in results/pairs
+# 'python3 ERX.py --telemetry' samples the progress of the search every 10 seconds in results/telemetry
+# 'python3 ERX.py --trace-allocations' records the 10 allocation sites holding the most memory (slows the search)
+# 'python3 ERX.py --track-best-partial' records the best partial model ever added to the frontier of a failed search
+# 'python3 ERX.py --async-verify' verifies each plan in the background while the next problem is searched
+# 'python3 ERX.py --verify-cache' reuses verification results of identical plans cached on disk by previous runs
+run_test = partial(run_test, resume='--resume' in sys.argv, parse_cache='--parse-cache' in sys.argv,
+                   metrics_cache='--metrics-cache' in sys.argv, save_final_states='--save-final-states' in sys.argv,
+                   coverage_interval=1000 if '--coverage' in sys.argv else 0,
+                   pair_interval=1000 if '--pairs' in sys.argv else 0,
+                   telemetry_seconds=10 if '--telemetry' in sys.argv else 0,
+                   trace_allocations=10 if '--trace-allocations' in sys.argv else 0,
+                   track_best_partial='--track-best-partial' in sys.argv,
+                   verification_workers=1 if '--async-verify' in sys.argv else 0,
+                   verify_cache='--verify-cache' in sys.argv)
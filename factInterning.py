@@ -0,0 +1,197 @@
+import os
+import sys
+import glob
+import array
+import weakref
+import argparse
+
+# Folder the final states of each strategy are saved in (see save_final_state)
+FINAL_STATES_FOLDER = 'results/final-states'
+
+# Fact interner of each problem, see get_fact_interner
+_fact_interners = weakref.WeakKeyDictionary()
+
+
+def _object_key(ob):
+    """
+    :param ob: Object of a problem (or its name)
+    :return: Name of the object
+    """
+    return getattr(ob, 'name', ob)
+
+
+class FactInterner:
+    """
+    Maps each possible fact of a problem to an integer ID, without grounding the facts.
+
+    The facts of a predicate are numbered as a mixed radix number - one digit per parameter, whose value is the
+    position of the fact's object among the objects satisfying the parameter's type (see typeIndex.py). Each
+    predicate's facts follow those of the previous predicate, so the IDs of a problem's facts are 0 to num_facts - 1
+    whichever process or strategy interns them. Facts of predicates without parameters are numbered after every other
+    fact, as they are not counted as possible facts.
+    """
+
+    def __init__(self, domain, problem):
+        """
+        :param domain: Domain object
+        :param problem: Problem object
+        """
+        from typeIndex import get_type_index    # Imported here so states can be compared without EPICpy
+        type_index = get_type_index(problem)
+        self.predicates = {}    # Predicate name -> (ID of first fact, list of (object name -> position), radixes)
+        self.num_facts = 0
+        nullary = []
+        for name in domain.predicates:
+            predicate = domain.get_predicate(name)
+            if not predicate.parameters:
+                nullary.append(name)
+                continue
+            positions = []
+            radixes = []
+            for param in predicate.parameters:
+                obs = type_index.get_objects(param.type)
+                positions.append({_object_key(ob): position for position, ob in enumerate(obs)})
+                radixes.append(len(obs))
+            self.predicates[name] = (self.num_facts, positions, radixes)
+            size = 1
+            for radix in radixes:
+                size *= radix
+            self.num_facts += size
+        self.num_ids = self.num_facts
+        for name in nullary:
+            self.predicates[name] = (self.num_ids, [], [])
+            self.num_ids += 1
+
+    def fact_id(self, fact):
+        """
+        :param fact: ProblemPredicate object
+        :return: Integer ID of the fact (None if it is not one of the problem's possible facts)
+        """
+        if fact.predicate.name not in self.predicates:
+            return None
+        fact_id, positions, radixes = self.predicates[fact.predicate.name]
+        if len(fact.objects) != len(positions):
+            return None
+        digits = 0
+        for ob, object_positions, radix in zip(fact.objects, positions, radixes):
+            position = object_positions.get(_object_key(ob))
+            if position is None:
+                return None
+            digits = digits * radix + position
+        return fact_id + digits
+
+    def fact_ids(self, facts):
+        """
+        :param facts: Iterable of ProblemPredicate objects e.g. model.current_state.elements
+        :return: array of the sorted unsigned integer IDs of the facts which are possible facts of the problem
+        """
+        ids = (self.fact_id(fact) for fact in facts)
+        return array.array('L', sorted(fact_id for fact_id in ids if fact_id is not None))
+
+
+def get_fact_interner(domain, problem):
+    """
+    :param domain: Domain object
+    :param problem: Problem object
+    :return: FactInterner of the problem, shared by every caller for as long as the problem exists
+    """
+    try:
+        if problem not in _fact_interners:
+            _fact_interners[problem] = FactInterner(domain, problem)
+        return _fact_interners[problem]
+    except TypeError:
+        return FactInterner(domain, problem)
+
+
+def to_bitset(fact_ids):
+    """
+    :param fact_ids: Iterable of integer fact IDs
+    :return: Integer with the bit of each fact set
+    """
+    fact_ids = list(fact_ids)
+    if not fact_ids:
+        return 0
+    packed = bytearray(max(fact_ids) // 8 + 1)
+    for fact_id in fact_ids:
+        packed[fact_id >> 3] |= 1 << (fact_id & 7)
+    return int.from_bytes(packed, 'little')
+
+
+def count_facts(bits):
+    """
+    :param bits: Integer bitset of facts (see to_bitset)
+    :return: Integer of amount of facts in the bitset
+    """
+    return bin(bits).count('1')
+
+
+def state_overlap(bits_a, bits_b):
+    """
+    :param bits_a: Integer bitset of the facts of a state
+    :param bits_b: Integer bitset of the facts of another state
+    :return: (Integer of amount of facts in both states, Float of the Jaccard similarity of the states)
+    """
+    shared = count_facts(bits_a & bits_b)
+    union = count_facts(bits_a | bits_b)
+    return shared, shared / union if union else 1.0
+
+
+def get_final_state_file_name(results_file_name, problem_name):
+    """
+    :param results_file_name: String of path of the strategy's results file
+    :param problem_name: String of problem name e.g. 'Rover/p02.hddl'
+    :return: String of path the problem's final state is saved to
+    """
+    strategy_name = os.path.splitext(os.path.basename(results_file_name))[0]
+    return os.path.join(FINAL_STATES_FOLDER, strategy_name, problem_name.replace('/', '-') + '.ids')
+
+
+def save_final_state(file_name, fact_ids):
+    """
+    :param file_name: String of path to save the state to
+    :param fact_ids: array of integer fact IDs (see FactInterner.fact_ids)
+    :return: None
+
+    States are saved as 4 byte little endian IDs, so a state of a million facts takes 4MB. States with IDs which do
+    not fit in 4 bytes (problems with over 4 billion possible facts) are not saved.
+    """
+    if len(fact_ids) > 0 and max(fact_ids) >= 2 ** 32:
+        print("Not saving {}, its fact IDs do not fit in 4 bytes".format(file_name))
+        return
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    ids = array.array('I', fact_ids)
+    if sys.byteorder != 'little':
+        ids.byteswap()
+    with open(file_name, 'wb') as file:
+        ids.tofile(file)
+
+
+def load_final_state(file_name):
+    """
+    :param file_name: String of path a state was saved to (see save_final_state)
+    :return: array of integer fact IDs
+    """
+    ids = array.array('I')
+    with open(file_name, 'rb') as file:
+        ids.frombytes(file.read())
+    if sys.byteorder != 'little':
+        ids.byteswap()
+    return ids
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Compare the final states of two strategies' problems")
+    argparser.add_argument("folder_a", help='Final states folder of a strategy e.g. results/final-states/X')
+    argparser.add_argument("folder_b", help='Final states folder of another strategy')
+    args = argparser.parse_args()
+
+    print('Problem,facts_a,facts_b,shared_facts,jaccard')
+    for file_name_a in sorted(glob.glob(os.path.join(args.folder_a, '*.ids'))):
+        file_name_b = os.path.join(args.folder_b, os.path.basename(file_name_a))
+        if not os.path.exists(file_name_b):
+            continue
+        state_a = to_bitset(load_final_state(file_name_a))
+        state_b = to_bitset(load_final_state(file_name_b))
+        shared_facts, jaccard = state_overlap(state_a, state_b)
+        print('{},{},{},{},{}'.format(os.path.basename(file_name_a)[:-len('.ids')], count_facts(state_a),
+                                      count_facts(state_b), shared_facts, jaccard))
@@ -0,0 +1,262 @@
+import os
+import re
+import math
+import shlex
+import argparse
+from benchmarkManifest import add_selection_arguments, select_problems, selection_command_line, build_tests
+from benchmarkSharding import predict_costs, read_historic_times, shard_tests
+
+# Memory requested for a strategy when it has no 'evaluation-runners/ExperimentRunnerX.sh' file to copy it from
+DEFAULT_MEMORY = '24G'
+
+# Seconds of each element's time not given to its problems' time limit - the time a problem's process may run past
+# its limit before it is killed (parallelExperimentRunner.HARD_TIME_LIMIT_GRACE), plus time to start up and write rows
+ELEMENT_TIME_RESERVE = 600
+
+# Least time limit (seconds) given to each problem, however short the element's time
+MIN_PROBLEM_TIME_LIMIT = 60
+
+
+def parse_strategies(strategies_text):
+    """
+    :param strategies_text: String of comma separated strategies and ranges e.g. '1-5,14,20-22'
+    :return: List of integers
+    """
+    strategies = []
+    for part in strategies_text.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            strategies += list(range(int(start), int(end) + 1))
+        else:
+            strategies.append(int(part))
+    return strategies
+
+
+def parse_time(time_text):
+    """
+    :param time_text: String of SLURM time of the form 'H:MM:SS' e.g. '170:00:00'
+    :return: Integer of seconds
+    """
+    hours, minutes, seconds = [int(part) for part in time_text.split(':')]
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def format_time(seconds):
+    """
+    :param seconds: Integer of seconds
+    :return: String of SLURM time of the form 'H:MM:SS'
+    """
+    return "{}:{:02d}:{:02d}".format(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
+
+
+def get_strategy_memory(strategy):
+    """
+    :param strategy: Integer correlating to planner configuration
+    :return: String of memory to request for the strategy, copied from its ExperimentRunnerX.sh file
+    """
+    file_name = 'evaluation-runners/ExperimentRunner{}.sh'.format(strategy)
+    if os.path.exists(file_name):
+        with open(file_name, 'r') as file:
+            match = re.search(r'#SBATCH --mem[ =](\S+)', file.read())
+        if match:
+            return match.group(1)
+    return DEFAULT_MEMORY
+
+
+def scale_memory(memory, factor):
+    """
+    :param memory: String of SLURM memory e.g. '24G'
+    :param factor: Integer to multiply the memory by
+    :return: String of SLURM memory in the same unit e.g. '96G'
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([KMGT]?)', memory.strip().upper())
+    if match is None:
+        raise ValueError("Can not read memory '{}'".format(memory))
+    return '{}{}'.format(math.ceil(float(match.group(1)) * factor), match.group(2))
+
+
+def plan_jobs(problems, strategies, shard_count, min_time, max_time, time_margin, memory=None):
+    """
+    :param problems: List of (domain file path, problem file path) tuples
+    :param strategies: List of integers correlating to planner configurations
+    :param shard_count: Integer of amount of shards each strategy is split into
+    :param min_time: Integer of the least amount of seconds to request for a job
+    :param max_time: Integer of the most amount of seconds to request for a job
+    :param time_margin: Float which the predicted cost of a shard is multiplied by
+    :param memory: String of memory to request for every job (None uses each strategy's ExperimentRunnerX.sh)
+    :return: Dictionary mapping (memory, time) -> list of (strategy, shard index)
+
+    Each strategy is split into shards exactly as ExperimentRunner.py does with '--shard i/n'. A SLURM job array
+    shares one resource request between its elements, so elements are grouped by the resources they need.
+    """
+    use_history = len(read_historic_times()) > 0
+    groups = {}
+    for strategy in strategies:
+        tests = build_tests(problems, [strategy])
+        costs = predict_costs(tests)
+        shards = shard_tests(tests, shard_count, costs)
+        cost_lookup = dict(zip(tests, costs))
+        for shard_index, shard in enumerate(shards):
+            if not shard:
+                continue
+            if use_history:
+                # Round up to the hour so similar shards share a job array
+                predicted = sum(cost_lookup[test] for test in shard) * time_margin
+                time = math.ceil(predicted / 3600) * 3600
+                time = min(max(time, min_time), max_time)
+            else:
+                time = max_time
+            job_memory = memory if memory is not None else get_strategy_memory(strategy)
+            groups.setdefault((job_memory, time), []).append((strategy, shard_index))
+    return groups
+
+
+def write_array_script(file_name, elements, memory, time, shard_count, selection, processes, partition, mail_user):
+    """
+    :param file_name: String of path to write the sbatch script to
+    :param elements: List of (strategy, shard index) - one per job array element
+    :param memory: String of memory each problem needs - each element requests this for every problem it runs at once
+    :param time: Integer of seconds to request for each element
+    :param shard_count: Integer of amount of shards each strategy is split into
+    :param selection: String of command line options selecting the problems
+    :param processes: Integer of amount of problems each element runs at once
+    :param partition: String of SLURM partition to submit to
+    :param mail_user: String of email address to notify (None for no emails)
+    :return: None
+
+    When several problems are run at once, each is run in its own process limited to memory (see --memory-limit), so
+    one problem can not use the memory of the others.
+
+    Each problem's search is limited to the element's time less ELEMENT_TIME_RESERVE (see --time-limit), so a problem
+    which runs far longer than predicted is stopped with its row written rather than being killed with the job. Elements
+    run with --resume, so an array can be resubmitted to run only the problems which do not have a row yet.
+    """
+    memory_limit = ' --memory-limit {}'.format(memory) if processes > 1 else ''
+    time_limit = max(time - ELEMENT_TIME_RESERVE, MIN_PROBLEM_TIME_LIMIT)
+    lines = ['#!/bin/bash',
+             '',
+             '#SBATCH --job-name=EvaluationArray',
+             '#SBATCH -o slurms/slurm.%A_%a.out',
+             '#SBATCH -e slurms/slurm.%A_%a.err',
+             '#SBATCH --ntasks=1',
+             '#SBATCH --cpus-per-task={}'.format(processes),
+             '#SBATCH --mem {}'.format(scale_memory(memory, processes)),
+             '#SBATCH --time={}'.format(format_time(time)),
+             '#SBATCH --partition={}'.format(partition),
+             '#SBATCH --array=0-{}'.format(len(elements) - 1)]
+    if mail_user is not None:
+        lines += ['#SBATCH --mail-user={}'.format(mail_user), '#SBATCH --mail-type=FAIL']
+    lines += ['',
+              'STRATEGIES=({})'.format(' '.join(str(strategy) for strategy, _ in elements)),
+              'SHARDS=({})'.format(' '.join(str(shard_index) for _, shard_index in elements)),
+              '',
+              'cd "$SLURM_SUBMIT_DIR"',
+              'date',
+              'hostname',
+              'module load python-3.9.1',
+              '',
+              'python3 ExperimentRunner.py ${{STRATEGIES[$SLURM_ARRAY_TASK_ID]}} '
+              '--shard ${{SHARDS[$SLURM_ARRAY_TASK_ID]}}/{} --processes {}{} --time-limit {} --resume {}'.format(
+                  shard_count, processes, memory_limit, time_limit, selection).rstrip(),
+              '']
+    with open(file_name, 'w') as file:
+        file.write('\n'.join(lines))
+
+
+def write_merge_script(file_name, strategies, partition, mail_user):
+    """
+    :param file_name: String of path to write the sbatch script to
+    :param strategies: List of integers correlating to planner configurations
+    :param partition: String of SLURM partition to submit to
+    :param mail_user: String of email address to notify (None for no emails)
+    :return: None
+    """
+    lines = ['#!/bin/bash',
+             '',
+             '#SBATCH --job-name=EvaluationMerge',
+             '#SBATCH -o slurms/slurm.%j.out',
+             '#SBATCH -e slurms/slurm.%j.err',
+             '#SBATCH --ntasks=1',
+             '#SBATCH --mem 4G',
+             '#SBATCH --time=1:00:00',
+             '#SBATCH --partition={}'.format(partition)]
+    if mail_user is not None:
+        lines += ['#SBATCH --mail-user={}'.format(mail_user), '#SBATCH --mail-type=ALL']
+    lines += ['',
+              'cd "$SLURM_SUBMIT_DIR"',
+              'module load python-3.9.1',
+              '',
+              'python3 mergeResults.py {}'.format(' '.join(str(strategy) for strategy in strategies)),
+              '']
+    with open(file_name, 'w') as file:
+        file.write('\n'.join(lines))
+
+
+def write_submit_script(file_name, array_script_names, merge_script_name, working_dir):
+    """
+    :param file_name: String of path to write the submission script to
+    :param array_script_names: List of paths of the job array sbatch scripts
+    :param merge_script_name: String of path of the merge sbatch script
+    :param working_dir: String of path of the folder jobs are submitted (and run) from
+    :return: None
+
+    The merge job only starts once every job array has finished.
+    """
+    lines = ['#!/bin/bash',
+             '# Submits the evaluation job arrays, then the job merging their results',
+             'set -e',
+             'cd {}'.format(shlex.quote(working_dir)),
+             'mkdir -p slurms',
+             '',
+             'JOBS=""']
+    for array_script_name in array_script_names:
+        lines.append('JOBS="$JOBS:$(sbatch --parsable {} | cut -d\';\' -f1)"'.format(array_script_name))
+    lines += ['sbatch --dependency=afterany$JOBS {}'.format(merge_script_name),
+              '']
+    with open(file_name, 'w') as file:
+        file.write('\n'.join(lines))
+    os.chmod(file_name, 0o755)
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--strategies", default=None,
+                           help='Strategies to evaluate, comma separated numbers and ranges e.g. 1-5,14 (defaults to '
+                                'the strategies in the manifest, or 1-34)')
+    argparser.add_argument("--shards", type=int, required=True, help='Amount of shards each strategy is split into')
+    add_selection_arguments(argparser)
+    argparser.add_argument("--processes", type=int, default=1, help='Amount of problems each job runs at once')
+    argparser.add_argument("--memory", default=None,
+                           help="Memory to request for every job (defaults to each strategy's ExperimentRunnerX.sh)")
+    argparser.add_argument("--min-time", default='1:00:00', help='Least time to request for a job (H:MM:SS)')
+    argparser.add_argument("--max-time", default='170:00:00', help='Most time to request for a job (H:MM:SS)')
+    argparser.add_argument("--time-margin", type=float, default=2.0,
+                           help='Multiplier applied to the predicted time of each shard')
+    argparser.add_argument("--partition", default='compute', help='SLURM partition to submit to')
+    argparser.add_argument("--mail-user", default=None, help='Email address to notify')
+    argparser.add_argument("--output-folder", default='slurm', help='Folder to write the scripts to')
+    args = argparser.parse_args()
+
+    problems, strategies = select_problems(args)
+    if args.strategies is not None:
+        strategies = parse_strategies(args.strategies)
+    elif strategies is None:
+        strategies = parse_strategies('1-34')
+    groups = plan_jobs(problems, strategies, args.shards, parse_time(args.min_time), parse_time(args.max_time),
+                       args.time_margin, args.memory)
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    array_script_names = []
+    for (memory, time), elements in sorted(groups.items(), key=lambda item: item[0][1]):
+        array_script_name = '{}/evaluation-array-{}.sh'.format(args.output_folder, len(array_script_names))
+        write_array_script(array_script_name, elements, memory, time, args.shards, selection_command_line(args),
+                           args.processes, args.partition, args.mail_user)
+        array_script_names.append(array_script_name)
+        print("{}: {} jobs, {} memory, {} time".format(array_script_name, len(elements),
+                                                       scale_memory(memory, args.processes), format_time(time)))
+
+    merge_script_name = '{}/merge-results.sh'.format(args.output_folder)
+    write_merge_script(merge_script_name, strategies, args.partition, args.mail_user)
+    submit_script_name = '{}/submit.sh'.format(args.output_folder)
+    write_submit_script(submit_script_name, array_script_names, merge_script_name, os.getcwd())
+    print("Submit with: {}".format(submit_script_name))
@@ -0,0 +1,109 @@
+import os
+import threading
+import tracemalloc
+from searchInstrumentation import get_rss
+
+# Seconds between samples of resident memory, where the kernel's peak can not be reset (see PeakMemoryMonitor)
+SAMPLE_INTERVAL = 0.05
+
+
+def _reset_peak_rss():
+    """
+    :return: Boolean - was the kernel's record of this process' peak resident memory reset (Linux only)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _read_peak_rss():
+    """
+    :return: Integer of bytes of peak resident memory of this process since it was last reset (None if unknown)
+    """
+    try:
+        with open('/proc/self/status', 'r') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class PeakMemoryMonitor:
+    """
+    Measures the peak resident memory of this process while a problem is run, and optionally where the most memory
+    allocated by Python code during the run is held.
+
+    On Linux the kernel's peak is reset when monitoring starts and read when it stops, so the peak is exact and costs
+    nothing while the problem runs, even when a process runs several problems. Elsewhere resident memory is sampled
+    every SAMPLE_INTERVAL seconds by a background thread, so short peaks may be missed, and where resident memory can
+    not be read at all (see get_rss) the peak is 'N/A'. Memory of child processes (e.g. the plan verifier) is not
+    included.
+    """
+
+    def __init__(self, trace_allocations=0):
+        """
+        :param trace_allocations: Integer of amount of allocation sites to report (0 to not trace allocations, which
+        slows Python code down considerably when enabled)
+        """
+        self.trace_allocations = trace_allocations
+        self.peak_rss = 0
+        self.kernel_peak = False
+        self.stop_sampling = threading.Event()
+        self.sampler = None
+        self.running = False
+
+    def _sample(self):
+        while not self.stop_sampling.wait(SAMPLE_INTERVAL):
+            self.peak_rss = max(self.peak_rss, get_rss())
+
+    def start(self):
+        """
+        :return: None
+        """
+        self.running = True
+        if self.trace_allocations > 0:
+            tracemalloc.start()
+        self.kernel_peak = _reset_peak_rss() and _read_peak_rss() is not None
+        if not self.kernel_peak:
+            self.peak_rss = get_rss()
+            if self.peak_rss is None:
+                self.peak_rss = 'N/A'
+                self.sampler = None
+                return
+            self.sampler = threading.Thread(target=self._sample, daemon=True)
+            self.sampler.start()
+
+    def stop(self):
+        """
+        :return: (Integer of bytes of peak resident memory ('N/A' if unknown), String of the top allocation sites e.g.
+        'domain.py:120=51.2MB;model.py:88=20.3MB' - 'N/A' if allocations were not traced)
+
+        Stopping a monitor which is not running (e.g. already stopped) returns the previous peak and 'N/A'.
+        """
+        if not self.running:
+            return self.peak_rss, 'N/A'
+        self.running = False
+        if self.kernel_peak:
+            self.peak_rss = _read_peak_rss()
+        elif self.sampler is not None:
+            self.stop_sampling.set()
+            self.sampler.join()
+            self.stop_sampling.clear()
+            self.peak_rss = max(self.peak_rss, get_rss())
+
+        top_allocations = 'N/A'
+        if self.trace_allocations > 0:
+            try:
+                statistics = tracemalloc.take_snapshot().statistics('lineno')[:self.trace_allocations]
+            finally:
+                tracemalloc.stop()
+            # Separated by ';' so the sites fit in one column of the results file
+            top_allocations = ';'.join('{}:{}={:.1f}MB'.format(os.path.basename(stat.traceback[0].filename),
+                                                               stat.traceback[0].lineno, stat.size / 2 ** 20)
+                                       for stat in statistics)
+        return self.peak_rss, top_allocations
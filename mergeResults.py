@@ -0,0 +1,90 @@
+import os
+import glob
+import argparse
+from calculateResultsStats import calculate_stats, find_results_file
+from ExperiementRunnerPlannerSetup import get_results_file_name
+from benchmarkSharding import shard_results_file_name
+try:
+    import fcntl    # Used to lock results files - not available on Windows
+except ImportError:
+    fcntl = None
+
+
+def find_shard_results_files(file_name):
+    """
+    :param file_name: String of path where results for a strategy are recorded
+    :return: List of paths of the shard results files belonging to the strategy
+    """
+    pattern = shard_results_file_name(file_name, ('*', '*'))
+    return sorted(glob.glob(pattern))
+
+
+def merge_shard_results(file_name):
+    """
+    :param file_name: String of path where results for a strategy are recorded
+    :return: Dictionary mapping path of each version of the results file rows were merged into -> Integer of amount
+    of rows merged into it
+
+    Appends the rows of every shard results file belonging to the strategy to the strategy's results file. Rows
+    which were only partially written are dropped. Shard files written with different columns are merged into the
+    version of the results file with the same columns (see calculateResultsStats.find_results_file). Merged shard
+    files are moved to 'shards/merged' so that running the merge again does not duplicate rows.
+    """
+    shard_files = find_shard_results_files(file_name)
+    if not shard_files:
+        return {}
+
+    rows = {}   # Header -> rows written under it
+    for shard_file in shard_files:
+        with open(shard_file, 'r') as file:
+            lines = file.read().splitlines()
+        if not lines:
+            continue
+        header = lines[0]
+        rows.setdefault(header, []).extend(line for line in lines[1:] if line.count(',') == header.count(','))
+
+    if '/' in file_name:
+        os.makedirs(file_name[:file_name.rfind('/')], exist_ok=True)
+
+    merged = {}
+    for header, header_rows in rows.items():
+        versioned_file_name = find_results_file(file_name, header)
+        write_file = open(versioned_file_name, 'a')
+        if fcntl is not None:
+            fcntl.flock(write_file, fcntl.LOCK_EX)
+        write_file.seek(0, os.SEEK_END)
+        if write_file.tell() == 0:
+            write_file.write(header)
+        for row in header_rows:
+            write_file.write('\n' + row)
+        write_file.flush()
+        if fcntl is not None:
+            fcntl.flock(write_file, fcntl.LOCK_UN)
+        write_file.close()
+        merged[versioned_file_name] = merged.get(versioned_file_name, 0) + len(header_rows)
+
+    # Move merged shard files out of the way
+    merged_folder = os.path.join(os.path.dirname(shard_files[0]), 'merged')
+    os.makedirs(merged_folder, exist_ok=True)
+    for shard_file in shard_files:
+        os.replace(shard_file, os.path.join(merged_folder, os.path.basename(shard_file)))
+    return merged
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("strategies", metavar='S', type=int, nargs="+",
+                           help='Numbers corresponding to the strategies whose shard results should be merged')
+    argparser.add_argument("--no-stats", action='store_true',
+                           help='Do not summarise the merged results files with calculate_stats')
+    args = argparser.parse_args()
+
+    for strategy in args.strategies:
+        results_file_name = get_results_file_name(strategy)
+        merged = merge_shard_results(results_file_name)
+        if not merged:
+            print("Merged 0 rows into {}".format(results_file_name))
+        for versioned_file_name, merged_rows in merged.items():
+            print("Merged {} rows into {}".format(merged_rows, versioned_file_name))
+            if merged_rows > 0 and not args.no_stats:
+                calculate_stats(versioned_file_name)
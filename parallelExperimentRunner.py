@@ -0,0 +1,278 @@
+import os
+import sys
+import copy
+import time
+import signal
+import multiprocessing
+from multiprocessing.connection import wait
+from ExperimentRunner import run_test, write_failed_run, load_domain, load_problem
+try:
+    import resource     # Used to limit the memory of worker processes - not available on Windows
+except ImportError:
+    resource = None
+
+# Amount of seconds a worker may run past its time limit (parsing, setup and writing results are not counted by the
+# time limit of run_test) before it is killed
+HARD_TIME_LIMIT_GRACE = 300
+
+# Amount of seconds a worker is given to exit after being asked to terminate, before it is killed
+TERMINATE_GRACE = 5
+
+
+def available_processes():
+    """
+    :return: Integer of the amount of CPUs this process is allowed to use
+    """
+    # sched_getaffinity respects the CPUs allocated by SLURM, cpu_count does not
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parse_memory(memory_text):
+    """
+    :param memory_text: String of memory e.g. '24G', '512M' or '1000000' (bytes)
+    :return: Integer of bytes
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    memory_text = memory_text.strip().upper()
+    if memory_text[-1] in units:
+        return int(float(memory_text[:-1]) * units[memory_text[-1]])
+    return int(memory_text)
+
+
+def _run_isolated_test(test, options, memory_limit, connection, domain=None, problem=None):
+    """
+    :param test: (domain file path, problem file path, strategy)
+    :param options: Dictionary of keyword arguments passed on to run_test
+    :param memory_limit: Integer of bytes of address space the process may use (None for no limit)
+    :param connection: Connection progress reports are sent through
+    :param domain: Domain object already parsed by the parent process (None to parse it in this process)
+    :param problem: Problem object already parsed by the parent process (None to parse it in this process)
+    :return: None
+
+    Target of the worker processes started by run_tests_parallel.
+    """
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        run_test(*test, report=connection.send, domain=domain, problem=problem, **options)
+    except MemoryError:
+        # Ran out of memory outside of the search (e.g. while parsing)
+        connection.send({'status': 'memout'})
+        sys.exit(1)
+    except Exception:
+        connection.send({'status': 'error'})
+        raise
+
+
+def _receive_progress(connection, progress):
+    """
+    :param connection: Connection a worker sends progress reports through
+    :param progress: Dictionary the reports are merged into
+    :return: None
+    """
+    if connection.closed:
+        return
+    try:
+        while connection.poll():
+            progress.update(connection.recv())
+    except (EOFError, OSError):
+        # Worker has exited (or been killed mid report) - nothing more to read
+        connection.close()
+
+
+def _get_domain(domains, test, parse_cache=False):
+    """
+    :param domains: Dictionary mapping domain file path -> parsed Domain object (None if it could not be parsed)
+    :param test: (domain file path, problem file path, strategy)
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :return: Domain object parsed from the test's domain file, parsed on first use (None if it could not be parsed)
+    """
+    domain_file_path = test[0]
+    if domain_file_path not in domains:
+        try:
+            domains[domain_file_path] = load_domain(domain_file_path, test[1], parse_cache)
+        except Exception as e:
+            # Leave each problem to parse the domain itself, so the error is recorded against the problem
+            print("Could not parse {}: {}".format(domain_file_path, e))
+            domains[domain_file_path] = None
+    return domains[domain_file_path]
+
+
+def _get_problem(parsed_problems, remaining_tests, test, domain, parse_cache=False):
+    """
+    :param parsed_problems: Dictionary mapping problem file path -> (Domain object, Problem object)
+    :param remaining_tests: Dictionary mapping problem file path -> amount of its tests not yet started
+    :param test: (domain file path, problem file path, strategy) about to be started
+    :param domain: Domain object parsed from the test's domain file (None if it could not be parsed)
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :return: (Domain object, Problem object) to give the test's worker (Problem object is None if the worker should
+    parse the problem itself)
+
+    Problems with a single test are left for the worker to parse, so parsing still happens in parallel. Problems
+    with several tests are parsed once here and released once their last test has started.
+    """
+    problem_file_path = test[1]
+    remaining_tests[problem_file_path] -= 1
+    if problem_file_path not in parsed_problems:
+        if remaining_tests[problem_file_path] == 0 or domain is None:
+            return domain, None
+        try:
+            parsed_problems[problem_file_path] = load_problem(test[0], problem_file_path, copy.deepcopy(domain),
+                                                              parse_cache)
+        except Exception as e:
+            print("Could not parse {}: {}".format(problem_file_path, e))
+            parsed_problems[problem_file_path] = (domain, None)
+    if remaining_tests[problem_file_path] == 0:
+        return parsed_problems.pop(problem_file_path)
+    return parsed_problems[problem_file_path]
+
+
+def group_by_problem(tests):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :return: List of (domain file path, problem file path, list of strategies) tuples, in order of first appearance
+    """
+    groups = {}
+    for domain_file_path, problem_file_path, strategy in tests:
+        groups.setdefault((domain_file_path, problem_file_path), []).append(strategy)
+    return [(domain_file_path, problem_file_path, strategies)
+            for (domain_file_path, problem_file_path), strategies in groups.items()]
+
+
+def run_tests_parallel(tests, processes=None, time_limit=None, memory_limit=None, **options):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param processes: Integer of the maximum amount of problems to run at once (defaults to the amount of usable CPUs)
+    :param time_limit: Float of seconds the search of each problem may run for (None uses run_test's default)
+    :param memory_limit: Integer of bytes of address space each problem may use (None for no limit)
+    :param options: Keyword arguments passed on to run_test for every test
+    :return: List of tests whose worker process did not exit cleanly
+
+    Each problem is run by run_test in its own worker process, so the measurements taken for a problem are the same
+    as when running sequentially. Workers append their row to the strategy's results file themselves; the results
+    file is locked while a row is written.
+
+    A worker still running HARD_TIME_LIMIT_GRACE seconds after its time limit is killed. When a worker dies without
+    writing its row (killed, out of memory, crashed) a row is written for it, marked 'timeout', 'memout' or 'error',
+    using the last progress it reported.
+
+    When workers are started by forking, each domain is parsed once in this process and every worker inherits the
+    parsed domain (copy on write), so workers only parse their problem file. When several strategies are run on a
+    problem, the problem is also parsed once in this process, and its tests are started one after another.
+    """
+    if processes is None:
+        processes = available_processes()
+    if processes < 1:
+        raise ValueError("Amount of processes must be at least 1, not {}".format(processes))
+    if memory_limit is not None and resource is None:
+        raise ValueError("Memory limits are not supported on this platform")
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+
+    share_domains = multiprocessing.get_start_method() == 'fork'
+    parse_cache = options.get('parse_cache', False)
+    domains = {}
+    parsed_problems = {}    # Problem file path -> (Domain object, Problem object), for problems with tests pending
+    if share_domains:
+        # Start the tests of a problem one after another, so it is parsed once and then released
+        pending = [(domain_file_path, problem_file_path, strategy)
+                   for domain_file_path, problem_file_path, strategies in group_by_problem(tests)
+                   for strategy in strategies]
+    else:
+        pending = list(tests)
+    remaining_tests = {}    # Problem file path -> amount of tests not yet started
+    for test in pending:
+        remaining_tests[test[1]] = remaining_tests.get(test[1], 0) + 1
+    pending.reverse()   # Pop from the end so tests are started in the order given
+    running = {}    # Process sentinel -> worker dictionary
+    failed = []
+
+    while pending or running:
+        # Start new workers until every process slot is in use
+        while pending and len(running) < processes:
+            test = pending.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            domain, problem = None, None
+            if share_domains:
+                domain = _get_domain(domains, test, parse_cache)
+                domain, problem = _get_problem(parsed_problems, remaining_tests, test, domain, parse_cache)
+            process = multiprocessing.Process(target=_run_isolated_test,
+                                              args=(test, options, memory_limit, sender, domain, problem))
+            process.start()
+            sender.close()
+            deadline = time.monotonic() + time_limit + HARD_TIME_LIMIT_GRACE if time_limit is not None else None
+            running[process.sentinel] = {'process': process, 'test': test, 'connection': receiver,
+                                         'deadline': deadline, 'progress': {}, 'timed_out': False}
+
+        # Wait for a worker to finish or report progress, or until the next deadline
+        deadlines = [worker['deadline'] for worker in running.values() if worker['deadline'] is not None]
+        timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+        connections = {worker['connection']: sentinel for sentinel, worker in running.items()
+                       if not worker['connection'].closed}
+        ready = wait(list(running.keys()) + list(connections.keys()), timeout)
+
+        # Read progress reports, so a worker never blocks on a full pipe
+        for connection in ready:
+            if connection in connections:
+                _receive_progress(connection, running[connections[connection]]['progress'])
+        finished = [sentinel for sentinel in ready if sentinel in running]
+
+        # Kill workers which have run out of time
+        for sentinel, worker in running.items():
+            if sentinel not in finished and worker['deadline'] is not None and time.monotonic() >= worker['deadline']:
+                worker['timed_out'] = True
+                worker['process'].terminate()
+                worker['process'].join(TERMINATE_GRACE)
+                if worker['process'].is_alive():
+                    worker['process'].kill()
+                finished.append(sentinel)
+
+        for sentinel in finished:
+            worker = running.pop(sentinel)
+            process, test, connection = worker['process'], worker['test'], worker['connection']
+            process.join()
+            progress = worker['progress']
+            _receive_progress(connection, progress)
+            connection.close()
+
+            if process.exitcode != 0:
+                print("Worker for {} exited with code {}".format(test, process.exitcode))
+                failed.append(test)
+            if not progress.get('written'):
+                if worker['timed_out']:
+                    status = 'timeout'
+                elif 'status' in progress:
+                    status = progress['status']
+                elif process.exitcode == -signal.SIGKILL:
+                    status = 'memout'   # Most likely killed by the kernel's out of memory killer
+                else:
+                    status = 'error'
+                write_failed_run(test[1], test[2], status, progress, shard=options.get('shard'))
+
+    return failed
+
+
+def run_tests(tests, processes=1, time_limit=None, memory_limit=None, **options):
+    """
+    :param tests: List of (domain file path, problem file path, strategy) tuples
+    :param processes: Integer of the maximum amount of problems to run at once
+    :param time_limit: Float of seconds the search of each problem may run for (None uses run_test's default)
+    :param memory_limit: Integer of bytes of address space each problem may use (None for no limit)
+    :param options: Keyword arguments passed on to run_test for every test
+    :return: None
+
+    Runs the tests in this process when processes is 1 and no limits are set, otherwise hands them to
+    run_tests_parallel so each problem is isolated in its own process. Either way each domain is only parsed once;
+    in this process every problem is given a copy of the parsed domain, and each problem is parsed once for all of
+    its strategies (see run_strategies).
+    """
+    if processes == 1 and time_limit is None and memory_limit is None:
+        domains = {}
+        for domain_file_path, problem_file_path, strategies in group_by_problem(tests):
+            domain = _get_domain(domains, (domain_file_path, problem_file_path), options.get('parse_cache', False))
+            run_test(domain_file_path, problem_file_path, strategies if len(strategies) > 1 else strategies[0],
+                     domain=copy.deepcopy(domain) if domain is not None else None, **options)
+    else:
+        run_tests_parallel(tests, processes, time_limit, memory_limit, **options)
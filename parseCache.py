@@ -0,0 +1,186 @@
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+
+# Folder parsed domains and problems are cached in
+CACHE_FOLDER = 'cache/parsed'
+
+# Location of the EPICpy repository, whose source code the cache is invalidated by
+EPICPY_PATH = '../EPICpy'
+
+_epicpy_version = None
+
+
+def hash_file(file_path):
+    """
+    :param file_path: String of path of file to hash
+    :return: String of SHA-256 hex digest of the file's contents
+    """
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def hash_files(file_paths, version=''):
+    """
+    :param file_paths: Iterable of strings of paths of files to hash together
+    :param version: String hashed before the files, e.g. the EPICpy version
+    :return: String of SHA-256 hex digest of the version and files' contents (files which do not exist hash as missing)
+    """
+    digest = hashlib.sha256(version.encode())
+    for file_path in file_paths:
+        digest.update(hash_file(file_path).encode() if os.path.exists(file_path) else b'missing')
+    return digest.hexdigest()
+
+
+def get_epicpy_version():
+    """
+    :return: String identifying the EPICpy source code in use
+
+    The version is a hash of every Python file in EPICpy (tests excluded), so any change to EPICpy - committed or
+    not - invalidates the cache.
+    """
+    global _epicpy_version
+    if _epicpy_version is None:
+        digest = hashlib.sha256()
+        for root, folders, files in os.walk(EPICPY_PATH):
+            folders[:] = sorted(folder for folder in folders if folder not in ('Tests', '.git', '__pycache__'))
+            for file_name in sorted(files):
+                if file_name.endswith('.py'):
+                    file_path = os.path.join(root, file_name)
+                    digest.update(os.path.relpath(file_path, EPICPY_PATH).encode())
+                    digest.update(hash_file(file_path).encode())
+        _epicpy_version = digest.hexdigest()
+    return _epicpy_version
+
+
+def _get_cache_path(kind, *file_paths):
+    """
+    :param kind: String of what is cached e.g. 'domain'
+    :param file_paths: Strings of paths of the files the cached objects were parsed from
+    :return: String of path of the cache entry
+    """
+    return os.path.join(CACHE_FOLDER, '{}-{}.pickle'.format(kind, hash_files(file_paths, get_epicpy_version())))
+
+
+def write_atomic(cache_path, write, binary=False):
+    """
+    :param cache_path: String of path of the cache entry
+    :param write: Function taking the open file, which writes the entry to it
+    :param binary: Boolean - open the file in binary mode
+    :return: None
+
+    The entry is written to a temporary file then renamed, so concurrent readers never see a partial entry. The
+    temporary file is removed if writing fails, and the exception raised again.
+    """
+    cache_folder = os.path.dirname(cache_path)
+    os.makedirs(cache_folder, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=cache_folder, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb' if binary else 'w') as file:
+            write(file)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_json(cache_path):
+    """
+    :param cache_path: String of path of a JSON cache entry
+    :return: Cached value (None if not cached)
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print("Ignoring unreadable cache entry {}: {}".format(cache_path, e))
+        return None
+
+
+def save_json(cache_path, value):
+    """
+    :param cache_path: String of path of a JSON cache entry
+    :param value: Value to cache, must be JSON serialisable
+    :return: None
+    """
+    write_atomic(cache_path, lambda file: json.dump(value, file))
+
+
+def _load(cache_path):
+    """
+    :param cache_path: String of path of the cache entry
+    :return: Cached object (None if not cached)
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'rb') as file:
+            return pickle.load(file)
+    except Exception as e:
+        # Unreadable entry (e.g. written by an incompatible Python) - remove it so it is rebuilt
+        print("Removing unreadable parse cache entry {}: {}".format(cache_path, e))
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+
+
+def _save(cache_path, objects):
+    """
+    :param cache_path: String of path of the cache entry
+    :param objects: Object to cache
+    :return: None
+    """
+    try:
+        write_atomic(cache_path, lambda file: pickle.dump(objects, file, protocol=pickle.HIGHEST_PROTOCOL),
+                     binary=True)
+    except Exception as e:
+        # Objects which can not be pickled are simply not cached
+        print("Could not write parse cache entry {}: {}".format(cache_path, e))
+
+
+def load_domain(domain_file_path):
+    """
+    :param domain_file_path: String of file path of the domain file
+    :return: Cached Domain object (None if not cached)
+    """
+    return _load(_get_cache_path('domain', domain_file_path))
+
+
+def save_domain(domain_file_path, domain):
+    """
+    :param domain_file_path: String of file path of the domain file
+    :param domain: Domain object parsed from the domain file
+    :return: None
+    """
+    _save(_get_cache_path('domain', domain_file_path), domain)
+
+
+def load_problem(domain_file_path, problem_file_path):
+    """
+    :param domain_file_path: String of file path of the domain file
+    :param problem_file_path: String of file path of the problem file
+    :return: (Domain object, Problem object) (None if not cached)
+
+    The domain is cached alongside the problem, since parsing a problem can add to its domain.
+    """
+    return _load(_get_cache_path('problem', domain_file_path, problem_file_path))
+
+
+def save_problem(domain_file_path, problem_file_path, domain, problem):
+    """
+    :param domain_file_path: String of file path of the domain file
+    :param problem_file_path: String of file path of the problem file
+    :param domain: Domain object the problem was parsed with
+    :param problem: Problem object parsed from the problem file
+    :return: None
+    """
+    _save(_get_cache_path('problem', domain_file_path, problem_file_path), (domain, problem))
@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+
+# Phases of a run timed by run_test, in the order their columns appear in the results file
+PHASES = ('parse_domain', 'parse_problem', 'setup', 'search', 'metrics', 'plan_output', 'verification', 'write')
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall time (time.perf_counter) and CPU time (time.process_time) spent in each phase of a run.
+
+    CPU time is that of the whole process, so it includes any background threads (e.g. plan verification) running
+    during the phase, but not child processes such as the plan verifier itself.
+    """
+
+    def __init__(self):
+        self.wall_times = {}
+        self.cpu_times = {}
+        self.started = {}   # Phase name -> (wall time, CPU time) it was started at
+
+    def start(self, name):
+        """
+        :param name: String of phase name, one of PHASES
+        :return: None
+        """
+        self.started[name] = (time.perf_counter(), time.process_time())
+
+    def stop(self, name):
+        """
+        :param name: String of phase name, started with start
+        :return: None
+
+        A phase may be started and stopped several times, its times are added together.
+        """
+        wall_start, cpu_start = self.started.pop(name)
+        self.wall_times[name] = self.wall_times.get(name, 0.0) + time.perf_counter() - wall_start
+        self.cpu_times[name] = self.cpu_times.get(name, 0.0) + time.process_time() - cpu_start
+
+    @contextmanager
+    def phase(self, name):
+        """
+        :param name: String of phase name, one of PHASES
+        :return: Context manager timing the code it runs as part of the phase
+        """
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def get_columns(self):
+        """
+        :return: List of the wall and CPU time of every phase, in the order of get_header ('N/A' for phases not run)
+        """
+        columns = []
+        for name in PHASES:
+            columns.append(self.wall_times.get(name, 'N/A'))
+            columns.append(self.cpu_times.get(name, 'N/A'))
+        return columns
+
+
+def get_header():
+    """
+    :return: List of the results file column names of the phase times
+    """
+    header = []
+    for name in PHASES:
+        header += [name + '_wall_time', name + '_cpu_time']
+    return header
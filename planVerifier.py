@@ -0,0 +1,272 @@
+import os
+import re
+import signal
+import time
+import atexit
+import tempfile
+import threading
+import traceback
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import verificationCache
+try:
+    import resource     # Used to limit the memory of the verifier - not available on Windows
+except ImportError:
+    resource = None
+
+# Checks made by the PANDA plan verification module, a plan is verified when every one of them is true
+VERIFIER_CHECKS = ("IDs of subtasks used in the plan exist",
+                   "Tasks declared in plan actually exist and can be instantiated as given",
+                   "Methods don't contain duplicate subtasks",
+                   "Methods don't contain orphaned tasks",
+                   "Methods can be instantiated",
+                   "Order induced by methods is present in plan",
+                   "Plan is executable",
+                   "Plan verification result")
+
+# Path of the PANDA plan verification module
+VERIFIER_PATH = './pandaPIparser'
+
+# Amount of seconds the verifier may run for before it is killed (None for no limit)
+VERIFY_TIME_LIMIT = 3600
+
+# Amount of bytes of address space the verifier may use (None for no limit)
+VERIFY_MEMORY_LIMIT = None
+
+# Verification result used when the verifier could not be run
+FAILED_VERIFICATION = {'verified': 'N/A', 'checks': {}, 'exit_code': 'N/A', 'timed_out': False, 'wall_time': 'N/A',
+                       'cpu_time': 'N/A'}
+
+_pipeline = None
+_warned_memory_limit = False
+
+
+def parse_verifier_output(output):
+    """
+    :param output: String of output of the PANDA plan verification module
+    :return: Dictionary mapping the name of each check e.g. 'Plan is executable' -> Boolean of its outcome (None if
+    the verifier reported it as unknown, e.g. because an earlier check failed)
+    """
+    outcomes = {'true': True, 'false': False, 'unknown': None}
+    checks = {}
+    checking = False
+    for line in output.splitlines():
+        line = ''.join(s for s in line if 31 < ord(s) < 126).strip()
+        if line.startswith('Checking the given plan'):
+            checking = True     # Lines before this describe the verifier's configuration
+            continue
+        match = re.match(r'^(.+?):\s*(true|false|unknown)$', line)
+        if checking and match:
+            checks[match.group(1)] = outcomes[match.group(2)]
+    return checks
+
+
+def _limit_memory(pid, limit):
+    """
+    :param pid: Integer of process ID of the verifier
+    :param limit: Integer of bytes of address space the process may use
+    :return: Boolean - was the limit set
+
+    Set from outside the process rather than with preexec_fn, which is unsafe while other threads are running.
+    resource.prlimit is only available on Linux, elsewhere the verifier is run without a memory limit.
+    """
+    global _warned_memory_limit
+    if resource is not None and hasattr(resource, 'prlimit'):
+        resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        return True
+    if not _warned_memory_limit:
+        print('Limiting the memory of the plan verifier is not supported on this platform - running it without a '
+              'memory limit')
+        _warned_memory_limit = True
+    return False
+
+
+def run_verifier(domain_file_path, problem_file_path, plan_file_name):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_name: String of name of the plan file within the 'output' folder
+    :return: Dictionary with 'verified' (Boolean - was the plan verified, i.e. did the verifier exit with code 0 and
+    report every check in VERIFIER_CHECKS as true, 'N/A' if the verifier was killed before deciding), 'checks' (see parse_verifier_output), 'exit_code' (negative if killed by a signal), 'timed_out'
+    (Boolean - was the verifier killed for running longer than VERIFY_TIME_LIMIT), 'wall_time' and 'cpu_time'
+    (Floats of seconds the verifier took)
+
+    The verifier is limited to VERIFY_TIME_LIMIT seconds and VERIFY_MEMORY_LIMIT bytes of address space (Linux only,
+    see _limit_memory).
+    """
+    command = [VERIFIER_PATH, '-C', '--verify', domain_file_path, problem_file_path, 'output/' + plan_file_name]
+    timed_out = threading.Event()
+    # Held while the verifier is being killed or reaped, so it is never killed after it was reaped (when its PID may
+    # already belong to another process)
+    lock = threading.Lock()
+    with tempfile.TemporaryFile() as output_file:
+        start_time = time.perf_counter()
+        process = subprocess.Popen(command, stdout=output_file, stderr=subprocess.STDOUT)
+        if VERIFY_MEMORY_LIMIT is not None:
+            _limit_memory(process.pid, VERIFY_MEMORY_LIMIT)
+
+        def kill():
+            with lock:
+                if process.returncode is None:
+                    timed_out.set()
+                    # Not process.kill, which may reap the verifier (polling it first) before wait4 can
+                    os.kill(process.pid, signal.SIGKILL)
+
+        timer = threading.Timer(VERIFY_TIME_LIMIT, kill) if VERIFY_TIME_LIMIT is not None else None
+        if timer is not None:
+            timer.start()
+        # Wait with wait4 rather than process.wait, so the CPU time used by the verifier is known. WNOWAIT leaves the
+        # child waitable (so its PID can not be reused) until the lock is held and returncode is set
+        if hasattr(os, 'waitid'):
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        with lock:
+            _, wait_status, usage = os.wait4(process.pid, 0)
+            wall_time = time.perf_counter() - start_time
+            process.returncode = os.waitstatus_to_exitcode(wait_status)
+        if timer is not None:
+            timer.cancel()
+
+        output_file.seek(0)
+        output = output_file.read().decode(errors='replace')
+
+    checks = parse_verifier_output(output)
+    if timed_out.is_set() or process.returncode < 0:
+        verified = 'N/A'
+    else:
+        # A verifier which failed (e.g. could not read the plan) is not trusted, whatever checks it printed
+        verified = process.returncode == 0 and all(checks.get(check) is True for check in VERIFIER_CHECKS)
+    return {'verified': verified, 'checks': checks, 'exit_code': process.returncode, 'timed_out': timed_out.is_set(),
+            'wall_time': wall_time, 'cpu_time': usage.ru_utime + usage.ru_stime}
+
+
+def get_verification(domain_file_path, problem_file_path, plan_file_name, use_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_name: String of name of the plan file within the 'output' folder
+    :param use_cache: Boolean - reuse the result of verifying an identical plan for the same domain and problem
+    (see verificationCache.py), and cache the result when there is none
+    :return: Dictionary of the verification result (see run_verifier), with 'cached' True if it was taken from the
+    cache
+    """
+    plan_file_path = 'output/' + plan_file_name
+    if use_cache:
+        cached = verificationCache.load(VERIFIER_PATH, domain_file_path, problem_file_path, plan_file_path)
+        if cached is not None:
+            # The verifier is not run, so verifying cost nothing this time. Entries cached before a non-zero exit code
+            # made a plan not verified are corrected.
+            verified = cached['verified']
+            if verified is True and cached.get('exit_code') != 0:
+                verified = False
+            return dict(cached, verified=verified, wall_time=0.0, cpu_time=0.0, cached=True)
+    verification = run_verifier(domain_file_path, problem_file_path, plan_file_name)
+    if use_cache and verification['verified'] != 'N/A':
+        # Results of verifiers which were killed depend on the limits, not only on the files, so are not cached
+        verificationCache.save(VERIFIER_PATH, domain_file_path, problem_file_path, plan_file_path, verification)
+    return verification
+
+
+def verify_plan(domain_file_path, problem_file_path, plan_file_name, use_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_name: String of name of the plan file within the 'output' folder
+    :param use_cache: Boolean - use the verification cache (see get_verification)
+    :return: Boolean - was the plan verified ('N/A' if the verifier was killed before deciding)
+    """
+    return get_verification(domain_file_path, problem_file_path, plan_file_name, use_cache)['verified']
+
+
+class VerificationPipeline:
+    """
+    Verifies plans in background threads, so the next search can run while a plan is being verified.
+
+    At most workers plans are verified at once, and at most workers more wait to be verified - submitting further
+    plans blocks until one of them has been verified, so a slow verifier can not build up an unbounded backlog.
+    """
+
+    def __init__(self, workers=1):
+        """
+        :param workers: Integer of the amount of plans verified at once
+        """
+        if workers < 1:
+            raise ValueError("Amount of verification workers must be at least 1, not {}".format(workers))
+        self.pid = os.getpid()
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='verify')
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.futures = set()
+        self.lock = threading.Lock()
+
+    def submit(self, domain_file_path, problem_file_path, plan_file_name, callback, use_cache=False):
+        """
+        :param domain_file_path: String of file path of the problem's domain file
+        :param problem_file_path: String of file path of the problem's problem file
+        :param plan_file_name: String of name of the plan file within the 'output' folder
+        :param callback: Function called (from a background thread) with the dictionary returned by get_verification
+        :param use_cache: Boolean - use the verification cache (see get_verification)
+        :return: None
+        """
+        self.slots.acquire()
+        future = self.executor.submit(self._verify, domain_file_path, problem_file_path, plan_file_name, callback,
+                                      use_cache)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self._finished)
+
+    def _verify(self, domain_file_path, problem_file_path, plan_file_name, callback, use_cache):
+        try:
+            try:
+                verification = get_verification(domain_file_path, problem_file_path, plan_file_name, use_cache)
+            except Exception:
+                print("Could not verify {}:".format(plan_file_name))
+                traceback.print_exc()
+                verification = FAILED_VERIFICATION
+            callback(verification)
+        except Exception:
+            # Nothing waits on the future until the end of the run, so report errors (e.g. writing the row) now
+            traceback.print_exc()
+        finally:
+            self.slots.release()
+
+    def _finished(self, future):
+        with self.lock:
+            self.futures.discard(future)
+
+    def wait(self):
+        """
+        :return: None
+
+        Blocks until every submitted plan has been verified (and its callback has returned).
+        """
+        with self.lock:
+            futures = list(self.futures)
+        for future in futures:
+            future.result()
+
+
+def get_pipeline(workers=1):
+    """
+    :param workers: Integer of the amount of plans verified at once, used when the pipeline is first created
+    :return: VerificationPipeline shared by this process
+
+    A forked process does not inherit the threads of its parent's pipeline, so it is given a new one.
+    """
+    global _pipeline
+    if _pipeline is None or _pipeline.pid != os.getpid():
+        _pipeline = VerificationPipeline(workers)
+    return _pipeline
+
+
+def wait_for_verifications():
+    """
+    :return: None
+
+    Blocks until every plan submitted to this process' pipeline has been verified. Called at exit, so no results row
+    is lost when the run ends while plans are still being verified.
+    """
+    if _pipeline is not None and _pipeline.pid == os.getpid():
+        _pipeline.wait()
+
+
+atexit.register(wait_for_verifications)
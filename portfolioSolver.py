@@ -0,0 +1,199 @@
+import os
+import time
+import signal
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
+from ExperimentRunner import DEFAULT_TIME_LIMIT, run_search, can_verify, load_problem
+from planVerifier import verify_plan
+from benchmarkManifest import get_problem_name
+from ExperiementRunnerPlannerSetup import setup_controller, Runner
+try:
+    import fcntl    # Used to lock results files - not available on Windows
+except ImportError:
+    fcntl = None
+
+# File portfolio runs are recorded in
+PORTFOLIO_RESULTS_FILE = 'results/portfolio-results.csv'
+
+
+def _run_member(domain_file_path, problem_file_path, strategy, domain, problem, time_limit, verify, connection):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param strategy: Integer correlating to planner configuration
+    :param domain: Domain object parsed from domain_file_path
+    :param problem: Problem object parsed from problem_file_path
+    :param time_limit: Float of seconds the search may run for
+    :param verify: Boolean - verify the plan before reporting it
+    :param connection: Connection the outcome is sent through
+    :return: None
+
+    Target of the member processes started by solve_portfolio. The member leads its own process group, so cancelling
+    it also stops the plan verifier it may be running (see _cancel_member).
+    """
+    os.setpgrp()
+    controller = Runner(domain_file_path, problem_file_path)
+    setup_controller(controller, strategy)
+    controller.domain, controller.problem = domain, problem
+    controller.solver.solve(search=False)
+    res, num_expansions, solve_time, status = run_search(controller, time_limit)
+
+    outcome = {'strategy': strategy, 'status': status, 'num_expansions': num_expansions, 'plan_file': None,
+               'verified': 'N/A', 'verifiable': can_verify(res)}
+    if res is not None:
+        plan_file_name = "portfolio-{}-{}.txt".format(strategy, get_problem_name(problem_file_path).replace('/', '-'))
+        controller.output_result_file(res, plan_file_name)
+        outcome['plan_file'] = 'output/' + plan_file_name
+        if verify and can_verify(res):
+            outcome['verified'] = verify_plan(domain_file_path, problem_file_path, plan_file_name)
+    connection.send(outcome)
+
+
+def _cancel_member(process):
+    """
+    :param process: Process of a member started by solve_portfolio
+    :return: None
+
+    Terminates the member's whole process group, so a plan verifier it started is not left running.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass    # The member has already exited
+    process.join()
+
+
+def _is_accepted(outcome, verify):
+    """
+    :param outcome: Dictionary of a member's outcome (see _run_member)
+    :param verify: Boolean - only accept verified plans
+    :return: Boolean - is the member's plan accepted as the portfolio's plan
+
+    When verifying, a plan which can be verified is only accepted if the verifier verified it - a verifier which was
+    killed (verified 'N/A') has not. Plans which can not be verified (e.g. on Windows) are accepted as they are.
+    """
+    if outcome['plan_file'] is None:
+        return False
+    if verify and outcome['verifiable']:
+        return outcome['verified'] is True
+    return True
+
+
+def solve_portfolio(domain_file_path, problem_file_path, strategies, time_limit=DEFAULT_TIME_LIMIT, verify=True,
+                    parse_cache=False):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param strategies: List of integers correlating to planner configurations
+    :param time_limit: Float of seconds each strategy may search for
+    :param verify: Boolean - only accept plans verified by the PANDA plan verification module (see _is_accepted)
+    :param parse_cache: Boolean - use the parse cache (see parseCache.py)
+    :return: Dictionary with 'winner' (strategy which found the accepted plan, None if no strategy did), 'plan_file',
+    'latency' (seconds until the accepted plan was found) and 'members' (strategy -> outcome dictionary including
+    'latency' and 'status', cancelled members have the status 'cancelled')
+
+    Parses the problem once, then runs every strategy concurrently in a process forked from the parsed state. The
+    first plan found (and verified) is accepted and the remaining strategies are cancelled.
+    """
+    if multiprocessing.get_start_method() != 'fork':
+        raise RuntimeError("solve_portfolio requires the 'fork' start method")
+    domain, problem = load_problem(domain_file_path, problem_file_path, parse_cache=parse_cache)
+
+    start_time = time.monotonic()
+    members = {}    # Connection -> (strategy, process)
+    for strategy in strategies:
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_run_member, args=(domain_file_path, problem_file_path, strategy,
+                                                                    domain, problem, time_limit, verify, sender))
+        process.start()
+        sender.close()
+        members[receiver] = (strategy, process)
+
+    outcomes = {}
+    winner = None
+    try:
+        while members and winner is None:
+            for connection in wait(list(members.keys())):
+                strategy, process = members.pop(connection)
+                try:
+                    outcome = connection.recv()
+                except EOFError:
+                    # Process died without reporting (e.g. crashed or ran out of memory)
+                    outcome = {'strategy': strategy, 'status': 'error', 'plan_file': None, 'verified': 'N/A',
+                               'verifiable': False}
+                outcome['latency'] = time.monotonic() - start_time
+                outcomes[strategy] = outcome
+                connection.close()
+                process.join()
+                if winner is None and _is_accepted(outcome, verify):
+                    winner = strategy
+    finally:
+        # Cancel the strategies still searching (or every strategy, if interrupted)
+        for connection, (strategy, process) in members.items():
+            _cancel_member(process)
+            connection.close()
+            outcomes[strategy] = {'strategy': strategy, 'status': 'cancelled', 'plan_file': None,
+                                  'verified': 'N/A', 'verifiable': False, 'latency': time.monotonic() - start_time}
+
+    return {'winner': winner,
+            'plan_file': outcomes[winner]['plan_file'] if winner is not None else None,
+            'latency': outcomes[winner]['latency'] if winner is not None else None,
+            'members': outcomes}
+
+
+def write_portfolio_result(problem_file_path, strategies, result, file_name=PORTFOLIO_RESULTS_FILE):
+    """
+    :param problem_file_path: String of file path of the problem's problem file
+    :param strategies: List of integers correlating to the planner configurations in the portfolio
+    :param result: Dictionary returned by solve_portfolio
+    :param file_name: String of file name to write results to
+    :return: None
+
+    Members are recorded in the form 'strategy:status:latency', separated by ';'.
+    """
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    members = ';'.join('{}:{}:{:.3f}'.format(strategy, result['members'][strategy]['status'],
+                                             result['members'][strategy]['latency'])
+                       for strategy in strategies)
+    winner = result['winner']
+    write_file = open(file_name, 'a')
+    if fcntl is not None:
+        fcntl.flock(write_file, fcntl.LOCK_EX)
+    write_file.seek(0, os.SEEK_END)
+    if write_file.tell() == 0:
+        write_file.write('Problem,winner,latency,verified,members')
+    write_file.write("\n{},{},{},{},{}".format(get_problem_name(problem_file_path),
+                                               winner if winner is not None else 'N/A',
+                                               result['latency'] if winner is not None else 'N/A',
+                                               result['members'][winner]['verified'] if winner is not None else 'N/A',
+                                               members))
+    write_file.flush()
+    if fcntl is not None:
+        fcntl.flock(write_file, fcntl.LOCK_UN)
+    write_file.close()
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("domain", help='File path of the domain file')
+    argparser.add_argument("problem", help='File path of the problem file')
+    argparser.add_argument("--strategies", required=True,
+                           help='Comma separated numbers of the strategies to run concurrently e.g. 1,14,20')
+    argparser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                           help='Seconds each strategy may search for')
+    argparser.add_argument("--no-verify", action='store_true', help='Accept the first plan found without verifying it')
+    argparser.add_argument("--parse-cache", action='store_true',
+                           help='Reuse parsed domains and problems cached on disk by previous runs')
+    args = argparser.parse_args()
+
+    portfolio = [int(strategy) for strategy in args.strategies.split(',')]
+    portfolio_result = solve_portfolio(args.domain, args.problem, portfolio, args.time_limit, not args.no_verify,
+                                       args.parse_cache)
+    write_portfolio_result(args.problem, portfolio, portfolio_result)
+    if portfolio_result['winner'] is None:
+        print("No strategy found a plan")
+    else:
+        print("Strategy {} found a plan in {:.3f} seconds: {}".format(portfolio_result['winner'],
+                                                                      portfolio_result['latency'],
+                                                                      portfolio_result['plan_file']))
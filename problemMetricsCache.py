@@ -0,0 +1,38 @@
+import os
+from parseCache import hash_files, load_json, save_json, get_epicpy_version
+
+# Folder strategy independent problem metrics are cached in
+CACHE_FOLDER = 'cache/metrics'
+
+
+def _get_cache_path(domain_file_path, problem_file_path):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :return: String of path of the cache entry
+
+    Metrics are calculated from the objects EPICpy parses, so the EPICpy source code is part of the key.
+    """
+    file_paths = (domain_file_path, problem_file_path)
+    return os.path.join(CACHE_FOLDER, '{}.json'.format(hash_files(file_paths, get_epicpy_version())))
+
+
+def load(domain_file_path, problem_file_path):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :return: Dictionary of the cached metrics (None if not cached)
+    """
+    cache_path = _get_cache_path(domain_file_path, problem_file_path)
+    return load_json(cache_path)
+
+
+def save(domain_file_path, problem_file_path, metrics):
+    """
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param metrics: Dictionary of the problem's metrics, must be JSON serialisable
+    :return: None
+    """
+    cache_path = _get_cache_path(domain_file_path, problem_file_path)
+    save_json(cache_path, metrics)
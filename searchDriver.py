@@ -0,0 +1,177 @@
+import time
+from searchInstrumentation import BestPartialModelTracker
+
+# Seconds of search between checks of the deadline, progress reports and observers - batches of search steps are
+# resized to take about this long
+CHECK_INTERVAL = 0.005
+
+# Most search steps taken between checks
+MAX_BATCH_SIZE = 4096
+
+# Seconds the loop around each search step takes, see _get_step_overhead
+_step_overhead = None
+
+
+def _get_step_overhead(iterations=100000):
+    """
+    :param iterations: Integer of amount of steps to time
+    :return: Float of seconds the batch loop takes per search step, excluding the step itself
+
+    Measured once per process by running the loop with a step which does nothing.
+    """
+    global _step_overhead
+    if _step_overhead is None:
+        def step(_):
+            return None
+
+        start = time.perf_counter()
+        for steps_taken in range(1, iterations + 1):
+            res = step(True)
+            if res:
+                break
+        _step_overhead = (time.perf_counter() - start) / iterations
+    return _step_overhead
+
+
+class SearchDriver:
+    """
+    Runs a search which has been setup (solver.solve(search=False)) until it returns a plan, runs out of time or runs
+    out of memory.
+
+    Search steps are taken in batches, and the deadline (a monotonic clock), progress reports and observers are only
+    checked between batches. Each batch is resized to take about CHECK_INTERVAL seconds, so the deadline is overrun by
+    at most a few batches whatever the cost of a step, and batches end exactly when an observer is due.
+
+    The driver's own overhead - the time spent between batches (including observers), the estimated cost of the loop
+    around each step and, when tracking the best partial model, the time spent comparing models - is measured as
+    overhead_time, so expansions / (elapsed - overhead_time) is the planner's throughput.
+    """
+
+    def __init__(self, controller, time_limit, report=None, setup_time=None, observers=None,
+                 report_interval=10, track_best_partial=False):
+        """
+        :param controller: Runner object whose search has been setup
+        :param time_limit: Float of seconds the search may run for before giving up
+        :param report: Function called with a dictionary of progress so far (see get_progress) every report_interval
+        seconds (None for no reports)
+        :param setup_time: Float of time taken to setup (seconds), included in progress reports
+        :param observers: List of search observers (see searchInstrumentation.py), each observer's observe method is
+        called with (controller, expansions taken, seconds searched) every observer.interval expansions (if interval is
+        not 0) and, if the observer has a time_interval which is not None, when time_interval seconds have passed since
+        it last observed
+        :param report_interval: Float of seconds between progress reports
+        :param track_best_partial: Boolean - track the model with the most operations taken as models are added to
+        the frontier (see searchInstrumentation.BestPartialModelTracker), rather than leaving the caller to scan the
+        frontier if no plan is found. Tracking stops if models are found to enter the frontier other than through its
+        add method
+        """
+        self.controller = controller
+        self.time_limit = time_limit
+        self.report = report
+        self.setup_time = setup_time
+        self.observers = observers if observers is not None else []
+        self.report_interval = report_interval
+
+        self.num_expansions = 0
+        self.elapsed = 0.0
+        self.overhead_time = 0.0
+        self.result = None
+        self.status = 'unsolved'
+        self.best_partial_tracker = BestPartialModelTracker()
+        if track_best_partial:
+            self.best_partial_tracker.attach(controller.solver.search_models)
+
+    @property
+    def best(self):
+        """
+        :return: Model returned by the search if it found a plan, otherwise the model with the most operations taken
+        added to the frontier so far (None if the frontier is not tracked)
+        """
+        if self.result is not None:
+            return self.result
+        return self.best_partial_tracker.best
+
+    def get_progress(self):
+        """
+        :return: Dictionary of progress so far - 'num_expansions', 'solve_time' and 'setup_time', and when the best
+        partial model is tracked, its 'best_operations' (operations taken) and 'actual_facts' (facts in its state)
+        """
+        progress = {'num_expansions': self.num_expansions, 'solve_time': self.elapsed, 'setup_time': self.setup_time}
+        best = self.best_partial_tracker.best if self.best_partial_tracker.attached else None
+        if best is not None:
+            progress['best_operations'] = best.get_num_operations_taken()
+            progress['actual_facts'] = len(best.current_state.elements)
+        return progress
+
+    def _get_batch_limit(self):
+        """
+        :return: Integer of most steps the next batch may take, so it ends when the next observer is due
+        """
+        limit = MAX_BATCH_SIZE
+        for observer in self.observers:
+            if observer.interval:
+                limit = min(limit, observer.interval - self.num_expansions % observer.interval)
+        return limit
+
+    def run(self):
+        """
+        :return: Model returned by the search (None if no plan was found)
+        """
+        step = self.controller.solver._search
+        step_overhead = _get_step_overhead()
+        batch_size = 1
+        res = None
+        start_time = time.monotonic()
+        deadline = start_time + self.time_limit
+        last_report_time = start_time
+        last_observed = [0.0 for _ in self.observers]   # Seconds searched when each observer last observed
+        steps_taken = 0     # Steps of the current batch not yet added to num_expansions
+        try:
+            while True:
+                batch_limit = min(batch_size, self._get_batch_limit())
+                batch_start_time = time.monotonic()
+                for steps_taken in range(1, batch_limit + 1):
+                    res = step(True)    # Run next search step
+                    if res:
+                        break
+                batch_end_time = time.monotonic()
+                self.num_expansions += steps_taken
+                batch_steps, steps_taken = steps_taken, 0
+                self.elapsed = batch_end_time - start_time
+
+                if res:
+                    break
+                if self.best_partial_tracker.attached and not self.best_partial_tracker.check(batch_steps):
+                    print("Frontier grew by more models than were added to it, no longer tracking the best partial "
+                          "model")
+                for i, observer in enumerate(self.observers):
+                    time_interval = getattr(observer, 'time_interval', None)
+                    if (observer.interval and self.num_expansions % observer.interval == 0) or \
+                            (time_interval is not None and self.elapsed - last_observed[i] >= time_interval):
+                        observer.observe(self.controller, self.num_expansions, self.elapsed)
+                        last_observed[i] = self.elapsed
+                if batch_end_time >= deadline:
+                    self.status = 'timeout'
+                    break
+                if self.report is not None and batch_end_time - last_report_time >= self.report_interval:
+                    self.report(self.get_progress())
+                    last_report_time = batch_end_time
+
+                # Resize the next batch to take about CHECK_INTERVAL seconds, without passing the deadline by more
+                batch_time = batch_end_time - batch_start_time
+                if batch_time < CHECK_INTERVAL / 2 and batch_steps == batch_size:
+                    batch_size = min(batch_size * 2, MAX_BATCH_SIZE)
+                elif batch_time > CHECK_INTERVAL * 2:
+                    batch_size = max(batch_size // 2, 1)
+                self.overhead_time += time.monotonic() - batch_end_time
+        except MemoryError:
+            # Out of memory (e.g. the process' address space limit was reached) - record what we have so far
+            self.status = 'memout'
+            self.num_expansions += max(steps_taken - 1, 0)    # Steps of the batch completed before running out
+        self.elapsed = time.monotonic() - start_time
+        self.overhead_time += self.num_expansions * step_overhead + self.best_partial_tracker.overhead_time
+
+        if res:
+            self.result = res
+            self.status = 'solved'
+        return self.result
@@ -0,0 +1,438 @@
+import os
+import sys
+import time
+import random
+try:
+    import resource     # Used to read resident memory where /proc is not available - not available on Windows
+except ImportError:
+    resource = None
+from math import comb
+from factInterning import to_bitset, count_facts
+
+# Folder the coverage-over-time series of each strategy are saved in (see FactCoverageTracker)
+COVERAGE_FOLDER = 'results/coverage'
+
+# Folder the pair-coverage-over-time series of each strategy are saved in (see FactPairCollector)
+PAIRS_FOLDER = 'results/pairs'
+
+# Most possible facts of a problem whose fact pairs are kept as one bitset per fact (see FactPairCollector)
+DENSE_PAIRS_MAX_FACTS = 16384
+
+# Folder the search telemetry of each strategy is saved in (see TelemetrySampler)
+TELEMETRY_FOLDER = 'results/telemetry'
+
+# Counters of novelty solvers recorded by TelemetrySampler ('N/A' for solvers without them)
+NOVELTY_COUNTERS = ('num_novel_states', 'num_not_novel_states', 'num_novel_methods', 'num_not_novel_methods')
+
+# Seconds calling through BestPartialModelTracker's wrapper of the frontier's add takes, see _get_wrapper_overhead
+_wrapper_overhead = None
+
+
+def get_series_file_name(folder, results_file_name, problem_name):
+    """
+    :param folder: String of folder the series are saved in e.g. COVERAGE_FOLDER
+    :param results_file_name: String of path of the strategy's results file
+    :param problem_name: String of problem name e.g. 'Rover/p02.hddl'
+    :return: String of path the problem's series is saved to
+    """
+    strategy_name = os.path.splitext(os.path.basename(results_file_name))[0]
+    return os.path.join(folder, strategy_name, problem_name.replace('/', '-') + '.csv')
+
+
+class FrontierSampler:
+    """
+    Base of search observers (see run_search) which sample the states in the search's frontier.
+
+    Every interval expansions the states of (a sample of) the models in the frontier are passed to add_state, and a
+    point of the observer's series is recorded - the expansions, time, frontier size and states sampled, followed by
+    the observer's own measures (see measure). Observing runs between search steps, so its time is part of the
+    search driver's overhead_time (see searchDriver.py).
+    """
+
+    # Column names of the values returned by measure
+    MEASURES = ()
+
+    def __init__(self, interner, interval, max_states=1000):
+        """
+        :param interner: FactInterner of the problem being searched
+        :param interval: Integer of amount of expansions between samples of the frontier
+        :param max_states: Integer of the most states sampled from the frontier at once (None for every state)
+        """
+        self.interner = interner
+        self.interval = interval
+        self.max_states = max_states
+        self.series = []
+        self.random = random.Random(0)  # Seeded, so the same search samples the same states
+
+    def add_state(self, state):
+        """
+        :param state: State object e.g. model.current_state
+        :return: None
+        """
+        raise NotImplementedError
+
+    def measure(self):
+        """
+        :return: Tuple of the observer's measures so far, one per name in MEASURES
+        """
+        raise NotImplementedError
+
+    def sample_frontier(self, search_models):
+        """
+        :param search_models: Frontier of a search e.g. controller.solver.search_models
+        :return: (Integer of amount of models in the frontier, list of at most max_states of its models chosen
+        uniformly at random)
+
+        The frontier is not copied - with len and indexing only the sampled models are read, otherwise the frontier
+        is iterated once, keeping a reservoir of max_states models. Only frontiers supporting neither are listed with
+        get_model_list.
+        """
+        if hasattr(search_models, '__len__') and hasattr(search_models, '__getitem__'):
+            frontier_size = len(search_models)
+            if self.max_states is None or frontier_size <= self.max_states:
+                indices = range(frontier_size)
+            else:
+                indices = self.random.sample(range(frontier_size), self.max_states)
+            return frontier_size, [search_models[index] for index in indices]
+        if hasattr(search_models, '__iter__'):
+            models = []
+            frontier_size = 0
+            for frontier_size, model in enumerate(search_models, 1):
+                if self.max_states is None or frontier_size <= self.max_states:
+                    models.append(model)
+                else:
+                    index = self.random.randrange(frontier_size)
+                    if index < self.max_states:
+                        models[index] = model
+            return frontier_size, models
+        models = search_models.get_model_list()
+        if self.max_states is not None and len(models) > self.max_states:
+            return len(models), self.random.sample(models, self.max_states)
+        return len(models), models
+
+    def observe(self, controller, num_expansions, elapsed):
+        """
+        :param controller: Runner object being searched
+        :param num_expansions: Integer of expansions taken so far
+        :param elapsed: Float of seconds searched so far
+        :return: None
+        """
+        frontier_size, models = self.sample_frontier(controller.solver.search_models)
+        for model in models:
+            self.add_state(model.current_state)
+        self.series.append((num_expansions, elapsed, frontier_size, len(models)) + self.measure())
+
+    def write_series(self, file_name):
+        """
+        :param file_name: String of path to write the series to (as CSV)
+        :return: None
+        """
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'w') as file:
+            file.write(','.join(('number_expansions', 'solve_time', 'frontier_size', 'states_sampled') +
+                                self.MEASURES))
+            for point in self.series:
+                file.write('\n' + ','.join(str(value) for value in point))
+
+
+class FactCoverageTracker(FrontierSampler):
+    """
+    Records which of a problem's possible facts appear in the states explored, as a running coverage bitmap of
+    interned facts (see factInterning.py).
+    """
+
+    MEASURES = ('facts_covered', 'percentage_facts')
+
+    def __init__(self, interner, interval, max_states=1000):
+        super().__init__(interner, interval, max_states)
+        self.coverage = bytearray(interner.num_facts // 8 + 1)
+        self.num_covered = 0
+
+    def add_state(self, state):
+        for fact in state.elements:
+            fact_id = self.interner.fact_id(fact)
+            # Facts of predicates without parameters have IDs from num_facts, and are not possible facts
+            if fact_id is not None and fact_id < self.interner.num_facts:
+                byte, bit = fact_id >> 3, 1 << (fact_id & 7)
+                if not self.coverage[byte] & bit:
+                    self.coverage[byte] |= bit
+                    self.num_covered += 1
+
+    def measure(self):
+        num_facts = self.interner.num_facts
+        return self.num_covered, self.num_covered / num_facts * 100 if num_facts else 'N/A'
+
+
+class FactPairCollector(FrontierSampler):
+    """
+    Records which pairs of a problem's possible facts appear together in the states explored.
+
+    For problems of at most DENSE_PAIRS_MAX_FACTS possible facts, pairs are kept as one bitset per fact - bit k of
+    fact i's row is set when facts i and i + 1 + k have been seen together, so the rows form the upper triangle of the
+    pair matrix. Rows are only created for facts which have been seen, start after their own fact and only grow as far
+    as the highest fact seen with them, and the whole triangle takes at most num_facts ** 2 / 16 bytes. Adding a state
+    takes one bitset shift and OR per fact in the state.
+
+    Larger problems' rows would be too wide, so each row is instead split into 64 bit words, of which only those
+    holding a pair seen are kept. Memory then follows the pairs reached (about one dictionary entry per word with a
+    pair) whatever the amount of possible facts.
+    """
+
+    MEASURES = ('pairs_covered', 'percentage_pairs')
+
+    def __init__(self, interner, interval, max_states=100):
+        super().__init__(interner, interval, max_states)
+        self.sparse = interner.num_facts > DENSE_PAIRS_MAX_FACTS
+        self.rows = {}  # Fact ID i -> Integer bitset of the facts after i it has been seen with, offset by i + 1
+        self.words = {}     # Fact ID i * words_per_row + word index w -> Integer of bits 64w to 64w + 63 of i's row
+        self.words_per_row = (interner.num_facts >> 6) + 1
+
+    def add_state(self, state):
+        num_facts = self.interner.num_facts
+        # Facts of predicates without parameters (IDs from num_facts) are not possible facts, so not possible pairs
+        fact_ids = [fact_id for fact_id in self.interner.fact_ids(state.elements) if fact_id < num_facts]
+        if self.sparse:
+            self._add_words(fact_ids)
+            return
+        state_bits = to_bitset(fact_ids)
+        for fact_id in fact_ids:
+            later_bits = state_bits >> (fact_id + 1)
+            if later_bits:
+                self.rows[fact_id] = self.rows.get(fact_id, 0) | later_bits
+
+    def _add_words(self, fact_ids):
+        """
+        :param fact_ids: Sorted list of IDs of the possible facts of a state
+        :return: None
+        """
+        state_words = {}    # Word index -> Integer of the state's facts in the word (bit b is fact 64 * index + b)
+        for fact_id in fact_ids:
+            state_words[fact_id >> 6] = state_words.get(fact_id >> 6, 0) | 1 << (fact_id & 63)
+        word_indices = sorted(state_words)
+        first = 0   # Position in word_indices of the word of the current fact
+        for fact_id in fact_ids:
+            while word_indices[first] < fact_id >> 6:
+                first += 1
+            row_start = fact_id * self.words_per_row
+            for word_index in word_indices[first:]:
+                bits = state_words[word_index]
+                if word_index == fact_id >> 6:
+                    bits = bits >> ((fact_id & 63) + 1) << ((fact_id & 63) + 1)     # Only the facts after this one
+                if bits:
+                    key = row_start + word_index
+                    self.words[key] = self.words.get(key, 0) | bits
+
+    def count_pairs(self):
+        """
+        :return: Integer of amount of distinct fact pairs seen
+        """
+        rows = self.words if self.sparse else self.rows
+        return sum(count_facts(row) for row in rows.values())
+
+    def measure(self):
+        num_pairs = self.count_pairs()
+        possible_pairs = comb(self.interner.num_facts, 2)
+        return num_pairs, num_pairs / possible_pairs * 100 if possible_pairs else 'N/A'
+
+
+def _get_wrapper_overhead(iterations=100000):
+    """
+    :param iterations: Integer of amount of calls to time
+    :return: Float of seconds calling the frontier's add through BestPartialModelTracker's wrapper takes per call,
+    excluding comparing the model
+
+    Measured once per process, as the difference between calling an add which does nothing directly and through a
+    wrapper which times nothing.
+    """
+    global _wrapper_overhead
+    if _wrapper_overhead is None:
+        def add(model, *args, **kwargs):
+            return None
+
+        def wrapped(model, *args, **kwargs):
+            start = time.perf_counter()
+            _ = time.perf_counter() - start
+            return add(model, *args, **kwargs)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            add(None)
+        direct_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(iterations):
+            wrapped(None)
+        _wrapper_overhead = max(time.perf_counter() - start - direct_time, 0.0) / iterations
+    return _wrapper_overhead
+
+
+class BestPartialModelTracker:
+    """
+    Keeps the model with the most operations taken which has been added to the search's frontier, so a failed
+    search's best partial model is known without scanning the frontier when the search ends (when it is largest).
+
+    The frontier's add method is wrapped, so each model is compared once as the search step which generated it adds
+    it to the frontier. This relies on every model entering the frontier through add, which check tests between
+    batches of search steps: each step removes the model it expands, so the frontier can grow by at most the models
+    added less the steps taken, and if it grows by more, models were inserted another way and the tracker detaches
+    itself. The best model ever added may since have been
+    expanded, so it need not be in the final frontier and may differ from the model get_best_partial_model would
+    return.
+    """
+
+    def __init__(self):
+        self.best = None
+        self.best_operations = -1
+        self.attached = False
+        self.search_models = None
+        self.add = None             # The frontier's own add method, restored by detach
+        self.last_size = 0          # Size of the frontier when last checked
+        self.last_added = 0         # Value of num_added when last checked
+        self.num_added = 0
+        self.compare_time = 0.0     # Seconds spent comparing models added to the frontier
+
+    @property
+    def overhead_time(self):
+        """
+        :return: Float of seconds the wrapped add has cost the search - the time spent comparing models, plus the
+        estimated cost of calling through the wrapper (see _get_wrapper_overhead)
+        """
+        return self.compare_time + self.num_added * _get_wrapper_overhead()
+
+    def consider(self, model):
+        """
+        :param model: Model added to the frontier
+        :return: None
+        """
+        operations = model.get_num_operations_taken()
+        if operations > self.best_operations:
+            self.best = model
+            self.best_operations = operations
+
+    def attach(self, search_models):
+        """
+        :param search_models: Frontier of a search which has been setup e.g. controller.solver.search_models
+        :return: Boolean - is the frontier being tracked (if not, best stays None)
+
+        Only frontiers with an add method and a length (so check is cheap) can be tracked.
+        """
+        add = getattr(search_models, 'add', None)
+        if add is None or not hasattr(search_models, '__len__'):
+            return False
+
+        def tracked_add(model, *args, **kwargs):
+            start = time.perf_counter()
+            self.consider(model)
+            self.compare_time += time.perf_counter() - start
+            self.num_added += 1
+            return add(model, *args, **kwargs)
+
+        try:
+            search_models.add = tracked_add
+        except AttributeError:
+            return False    # e.g. the frontier's attributes can not be set
+        for model in search_models.get_model_list():    # Models added by the search's setup
+            self.consider(model)
+        self.search_models = search_models
+        self.add = add
+        self.last_size = len(search_models)
+        self.last_added = self.num_added
+        self.attached = True
+        return True
+
+    def check(self, num_steps):
+        """
+        :param num_steps: Integer of search steps taken since the last check
+        :return: Boolean - have all models which entered the frontier since the last check been added through add (if
+        not, the tracker is detached)
+        """
+        size = len(self.search_models)
+        if size - self.last_size > self.num_added - self.last_added - num_steps:
+            self.detach()
+            return False
+        self.last_size = size
+        self.last_added = self.num_added
+        return True
+
+    def detach(self):
+        """
+        :return: None
+
+        Restores the frontier's add method and forgets the best model, as models may have been missed.
+        """
+        self.search_models.add = self.add
+        self.search_models = None
+        self.add = None
+        self.best = None
+        self.best_operations = -1
+        self.attached = False
+
+
+def get_rss():
+    """
+    :return: Integer of bytes of memory currently resident for this process (the peak so far where the current
+    amount can not be read, None where neither can be e.g. on Windows)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return None
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024   # Kilobytes on Linux
+
+
+def get_frontier_size(search_models):
+    """
+    :param search_models: Frontier of a search e.g. controller.solver.search_models
+    :return: Integer of amount of models in the frontier
+    """
+    if hasattr(search_models, '__len__'):
+        return len(search_models)   # Avoids listing the models
+    return len(search_models.get_model_list())
+
+
+class TelemetrySampler:
+    """
+    Records the progress of a search - seconds searched, expansions, expansions per second since the previous sample,
+    frontier size, resident memory and novelty counters - every interval expansions and/or time_interval seconds.
+    """
+
+    def __init__(self, interval=0, time_interval=None):
+        """
+        :param interval: Integer of amount of expansions between samples (0 for none)
+        :param time_interval: Float of seconds between samples (None for none)
+        """
+        self.interval = interval
+        self.time_interval = time_interval
+        self.series = []
+        self.last_expansions = 0
+        self.last_elapsed = 0.0
+
+    def observe(self, controller, num_expansions, elapsed):
+        """
+        :param controller: Runner object being searched
+        :param num_expansions: Integer of expansions taken so far
+        :param elapsed: Float of seconds searched so far
+        :return: None
+        """
+        if elapsed > self.last_elapsed:
+            rate = (num_expansions - self.last_expansions) / (elapsed - self.last_elapsed)
+        else:
+            rate = 'N/A'
+        self.last_expansions, self.last_elapsed = num_expansions, elapsed
+        counters = tuple(getattr(controller.solver, counter, 'N/A') for counter in NOVELTY_COUNTERS)
+        self.series.append((round(elapsed, 3), num_expansions, rate if rate == 'N/A' else round(rate, 1),
+                            get_frontier_size(controller.solver.search_models), get_rss() or 'N/A') + counters)
+
+    def write_series(self, file_name):
+        """
+        :param file_name: String of path to write the series to (as CSV)
+        :return: None
+        """
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, 'w') as file:
+            file.write(','.join(('solve_time', 'number_expansions', 'expansions_per_second', 'frontier_size',
+                                 'rss') + NOVELTY_COUNTERS))
+            for point in self.series:
+                file.write('\n' + ','.join(str(value) for value in point))
@@ -0,0 +1,54 @@
+import weakref
+from ExperiementRunnerPlannerSetup import ParameterSelector
+
+# Type index of each problem, see get_type_index
+_type_indexes = weakref.WeakKeyDictionary()
+
+
+class TypeIndex:
+    """
+    Maps each type to the objects of a problem which satisfy it (including objects of its subtypes).
+
+    Each type is looked up in the type hierarchy once for every object, the first time it is asked for, so further
+    lookups do not check any types.
+    """
+
+    def __init__(self, problem):
+        """
+        :param problem: Problem object
+        """
+        self.objects = [problem.get_object(ob) for ob in problem.get_all_objects()]
+        self.type_objects = {}
+
+    def get_objects(self, param_type):
+        """
+        :param param_type: Type of a parameter e.g. predicate.parameters[0].type
+        :return: List of objects which satisfy the type
+        """
+        if param_type not in self.type_objects:
+            self.type_objects[param_type] = [ob for ob in self.objects
+                                             if ParameterSelector.check_satisfies_type(param_type, ob)]
+        return self.type_objects[param_type]
+
+    def count(self, param_type):
+        """
+        :param param_type: Type of a parameter
+        :return: Integer of amount of objects which satisfy the type
+        """
+        return len(self.get_objects(param_type))
+
+
+def get_type_index(problem):
+    """
+    :param problem: Problem object
+    :return: TypeIndex of the problem, shared by every caller for as long as the problem exists
+
+    Processes forked after the index is built (e.g. by run_strategies) inherit it along with the problem.
+    """
+    try:
+        if problem not in _type_indexes:
+            _type_indexes[problem] = TypeIndex(problem)
+        return _type_indexes[problem]
+    except TypeError:
+        # Problem objects which can not be weakly referenced (or hashed) are not shared
+        return TypeIndex(problem)
@@ -0,0 +1,44 @@
+import os
+from parseCache import hash_files, load_json, save_json
+
+# Folder plan verification results are cached in
+CACHE_FOLDER = 'cache/verified'
+
+
+def _get_cache_path(verifier_path, domain_file_path, problem_file_path, plan_file_path):
+    """
+    :param verifier_path: String of path of the verifier executable
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_path: String of file path of the plan
+    :return: String of path of the cache entry
+
+    The verifier itself is part of the key, so rebuilding it invalidates the cache.
+    """
+    file_paths = (verifier_path, domain_file_path, problem_file_path, plan_file_path)
+    return os.path.join(CACHE_FOLDER, '{}.json'.format(hash_files(file_paths)))
+
+
+def load(verifier_path, domain_file_path, problem_file_path, plan_file_path):
+    """
+    :param verifier_path: String of path of the verifier executable
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_path: String of file path of the plan
+    :return: Dictionary of the cached verification result (None if not cached)
+    """
+    cache_path = _get_cache_path(verifier_path, domain_file_path, problem_file_path, plan_file_path)
+    return load_json(cache_path)
+
+
+def save(verifier_path, domain_file_path, problem_file_path, plan_file_path, result):
+    """
+    :param verifier_path: String of path of the verifier executable
+    :param domain_file_path: String of file path of the problem's domain file
+    :param problem_file_path: String of file path of the problem's problem file
+    :param plan_file_path: String of file path of the plan
+    :param result: Dictionary of the verification result, must be JSON serialisable
+    :return: None
+    """
+    cache_path = _get_cache_path(verifier_path, domain_file_path, problem_file_path, plan_file_path)
+    save_json(cache_path, result)